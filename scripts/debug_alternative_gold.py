@@ -1,14 +1,19 @@
 """
 Test alternative gold price sources with simpler HTML structures.
 """
-import requests
 from bs4 import BeautifulSoup
-import warnings
-warnings.filterwarnings("ignore", message="Unverified HTTPS request")
+import io
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import TextIO
 
-from gold_dashboard.config import HEADERS, REQUEST_TIMEOUT
+from gold_dashboard.config import REQUEST_TIMEOUT, SESSION
 from gold_dashboard.utils import sanitize_vn_number
 
+# Gold-related keywords, matched case-insensitively in a single regex pass
+KEYWORDS_RE = re.compile(r'SJC|vàng|gold|mua|buy|bán|sell', re.IGNORECASE)
+
 # Alternative sources
 SOURCES = {
     "PNJ": "https://www.pnj.com.vn/blog/gia-vang/",
@@ -16,25 +21,25 @@ SOURCES = {
     "SJC_MOBILE": "https://sjc.com.vn/xml/tygiavang.xml",
 }
 
-def test_source(name, url):
-    print(f"\n{'='*60}")
-    print(f"Testing: {name}")
-    print(f"URL: {url}")
-    print('='*60)
+def test_source(name: str, url: str, out: TextIO = sys.stdout) -> None:
+    print(f"\n{'='*60}", file=out)
+    print(f"Testing: {name}", file=out)
+    print(f"URL: {url}", file=out)
+    print('='*60, file=out)
     
     try:
-        response = requests.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT, verify=False)
+        response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         
-        print(f"Status: {response.status_code}")
-        print(f"Content-Type: {response.headers.get('Content-Type', 'unknown')}")
-        print(f"Content length: {len(response.content)} bytes")
+        print(f"Status: {response.status_code}", file=out)
+        print(f"Content-Type: {response.headers.get('Content-Type', 'unknown')}", file=out)
+        print(f"Content length: {len(response.content)} bytes", file=out)
         
         # Save for inspection
         filename = f".cache/{name.lower()}_debug.html"
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(response.text)
-        print(f"Saved to: {filename}")
+        print(f"Saved to: {filename}", file=out)
         
         # Quick parse
         soup = BeautifulSoup(response.content, 'lxml')
@@ -42,11 +47,10 @@ def test_source(name, url):
         lines = [line.strip() for line in text.split('\n') if line.strip()]
         
         # Look for gold-related keywords and prices
-        keywords = ['SJC', 'vàng', 'gold', 'mua', 'buy', 'bán', 'sell']
         found_lines = []
         
         for i, line in enumerate(lines):
-            if any(kw.lower() in line.lower() for kw in keywords):
+            if KEYWORDS_RE.search(line):
                 # Check if there's a price nearby
                 for j in range(max(0, i-2), min(len(lines), i+3)):
                     price = sanitize_vn_number(lines[j])
@@ -55,19 +59,25 @@ def test_source(name, url):
                         break
         
         if found_lines:
-            print(f"\nFound {len(found_lines)} potential gold prices:")
+            print(f"\nFound {len(found_lines)} potential gold prices:", file=out)
             for idx, (line_num, context, price_text, price_val) in enumerate(found_lines[:5]):
-                print(f"  {idx+1}. Line {line_num}: {context[:50]}...")
-                print(f"     Price text: {price_text} -> {price_val:,.0f}")
+                print(f"  {idx+1}. Line {line_num}: {context[:50]}...", file=out)
+                print(f"     Price text: {price_text} -> {price_val:,.0f}", file=out)
         else:
-            print("\nNo gold prices found in expected range")
+            print("\nNo gold prices found in expected range", file=out)
             
     except Exception as e:
-        print(f"ERROR: {e}")
+        print(f"ERROR: {e}", file=out)
 
 if __name__ == "__main__":
     import os
     os.makedirs('.cache', exist_ok=True)
     
-    for name, url in SOURCES.items():
-        test_source(name, url)
+    # Sources are independent, so probe them concurrently; each task writes to
+    # its own buffer and the reports are printed in SOURCES order afterwards.
+    buffers = {name: io.StringIO() for name in SOURCES}
+    with ThreadPoolExecutor(max_workers=len(SOURCES)) as pool:
+        list(pool.map(lambda kv: test_source(kv[0], kv[1], buffers[kv[0]]), SOURCES.items()))
+
+    for name in SOURCES:
+        print(buffers[name].getvalue(), end="")
@@ -1,21 +1,16 @@
 """
 Debug script to inspect Mi Hồng HTML structure and test gold price extraction.
 """
-import requests
 from bs4 import BeautifulSoup
-import warnings
-warnings.filterwarnings("ignore", message="Unverified HTTPS request")
 
-from gold_dashboard.config import MIHONG_URL, HEADERS, REQUEST_TIMEOUT
+from gold_dashboard.config import MIHONG_URL, REQUEST_TIMEOUT, SESSION
 from gold_dashboard.utils import sanitize_vn_number
 
 def inspect_mihong():
     print("Fetching Mi Hồng HTML...")
-    response = requests.get(
+    response = SESSION.get(
         MIHONG_URL,
-        headers=HEADERS,
-        timeout=REQUEST_TIMEOUT,
-        verify=False
+        timeout=REQUEST_TIMEOUT
     )
     response.raise_for_status()
     
@@ -1,10 +1,16 @@
 """
 Configuration file for Vietnam Gold Dashboard.
-Contains URLs, HTTP headers, CSS selectors, and cache settings.
+Contains URLs, HTTP headers, the shared HTTP session, CSS selectors, and cache settings.
 """
 
 from decimal import Decimal
 
+import certifi
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
 CACHE_TTL_SECONDS = 600
 
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -13,7 +19,8 @@ HEADERS = {
     "User-Agent": USER_AGENT,
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.9,vi;q=0.8",
-    "Accept-Encoding": "gzip, deflate, br",
+    # Only advertise codings urllib3 can decode here (br needs the brotli package)
+    "Accept-Encoding": DEFAULT_ACCEPT_ENCODING,
     "Connection": "keep-alive",
     "Upgrade-Insecure-Requests": "1",
     "Sec-Fetch-Dest": "document",
@@ -30,14 +37,16 @@ DOJI_API_URL = (
     "http://giavang.doji.vn/api/giavang/?api_key=258fbd2a72ce8481089d88c678e9fe4f"
 )
 CHOGIA_AJAX_URL = "https://chogia.vn/wp-admin/admin-ajax.php"
+# Per-request extras for the chogia.vn form POSTs; SESSION supplies the rest
+CHOGIA_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
 VIETSTOCK_URL = "https://banggia.vietstock.vn/bang-gia/vn30"
 CAFEF_URL = "https://s.cafef.vn/hastc/VN30-INDEX.chn"
 
 # Fallback APIs (international-friendly, work from any IP)
 OPEN_ER_API_URL = "https://open.er-api.com/v6/latest/USD"
-VPS_VN30_API_URL = (
-    "https://histdatafeed.vps.com.vn/tradingview/history?symbol=VN30&resolution=D"
-)
+# Base URL + fixed query; callers add the from/to window via requests' params=
+VPS_VN30_API_URL = "https://histdatafeed.vps.com.vn/tradingview/history"
+VPS_VN30_PARAMS = {"symbol": "VN30", "resolution": "D"}
 
 COINMARKETCAP_BTC_VND_URL = "https://coinmarketcap.com/currencies/bitcoin/btc/vnd/"
 COINGECKO_API_URL = (
@@ -45,9 +54,8 @@ COINGECKO_API_URL = (
 )
 
 # Historical data APIs
-COINGECKO_MARKET_CHART_URL = (
-    "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart?vs_currency=vnd"
-)
+COINGECKO_MARKET_CHART_URL = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
+COINGECKO_MARKET_CHART_PARAMS = {"vs_currency": "vnd"}
 WEBGIA_GOLD_1Y_URL = "https://webgia.com/gia-vang/sjc/bieu-do-1-nam.html"
 
 # Period label -> number of days for historical lookups
@@ -75,8 +83,58 @@ BLACK_MARKET_PREMIUM = Decimal("1.025")  # ~2.5%
 
 REQUEST_TIMEOUT = 10
 
+# After a gold source fails it is skipped for this long, so a dead source does
+# not cost a full REQUEST_TIMEOUT on every refresh. Kept well above
+# CACHE_TTL_SECONDS: fetch() only re-runs after the cache expires.
+SOURCE_FAIL_TTL_SECONDS = 1800
+
+# Shared HTTP session: keeps keep-alive connections to each source warm across
+# polling cycles instead of paying a fresh TCP + TLS handshake on every fetch.
+# Only connection failures are retried; read timeouts fail fast so the
+# repository fallback chains move on to the next source.
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+# Every source is verified against the pinned certifi CA bundle
+SESSION.verify = certifi.where()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, read=False, backoff_factor=0.3),
+    ),
+)
+
+# The JSON APIs behind the history fetches throttle bursts, so only their
+# hosts also retry throttling/overload responses with a short backoff.
+# Retry-After is ignored: urllib3 would sleep for as long as the server
+# asks (capped at hours, not REQUEST_TIMEOUT), stalling the whole refresh.
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+API_RETRY_HOSTS = (
+    "https://api.coingecko.com/",
+    "https://chogia.vn/",
+    "https://histdatafeed.vps.com.vn/",
+)
+_API_RETRY = Retry(
+    total=2,
+    read=False,
+    backoff_factor=0.3,
+    status_forcelist=RETRY_STATUS_CODES,
+    respect_retry_after_header=False,
+    # chogia.vn serves read-only chart data over POST, so it is safe to replay
+    allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"},
+)
+for _prefix in API_RETRY_HOSTS:
+    SESSION.mount(_prefix, HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=_API_RETRY))
+
 CACHE_DIR = ".cache"
 
+# The reference values behind historical changes (the price N days ago) only
+# move when the calendar day rolls over, so HistoryRepository.fetch_changes
+# reuses them for this long within the same day instead of re-querying the
+# history APIs.
+HISTORY_CHANGES_TTL_SECONDS = 21600
+
 # Gasoline price sources (Vietnam retail, government-regulated)
 XANGDAU_URL = "https://xangdau.net/"
 PETROLIMEX_URL = "https://www.petrolimex.com.vn/nd/gia-ban-le-xang-dau.html"
@@ -3,12 +3,13 @@ Rich terminal dashboard UI for Vietnam Gold Dashboard.
 Displays gold, currency, crypto, and stock data with color-coded freshness indicators.
 """
 
-from rich.console import Console
+from rich.console import Console, Group
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
 from datetime import datetime, timedelta
 from decimal import Decimal
+from functools import lru_cache
 from typing import Optional, Dict
 
 from .models import DashboardData, GoldPrice, UsdVndRate, BitcoinPrice, Vn30Index, LandPrice, AssetHistoricalData
@@ -25,32 +26,15 @@ def format_vn_number(value: Decimal, decimal_places: int = 0) -> str:
     if value is None:
         return "N/A"
     
-    value_str = str(value)
-    
-    if '.' in value_str:
-        integer_part, decimal_part = value_str.split('.')
-    else:
-        integer_part = value_str
-        decimal_part = ""
-    
-    integer_part = integer_part.lstrip('-')
-    is_negative = str(value).startswith('-')
-    
-    formatted_int = ""
-    for i, digit in enumerate(reversed(integer_part)):
-        if i > 0 and i % 3 == 0:
-            formatted_int = "." + formatted_int
-        formatted_int = digit + formatted_int
+    # Decimal's own ',' grouping does the thousands split in C.
+    integer_part, _, decimal_part = format(value, ",f").partition('.')
+    formatted_int = integer_part.replace(',', '.')
     
     if decimal_part and decimal_places > 0:
-        decimal_part = decimal_part[:decimal_places]
-        result = f"{formatted_int},{decimal_part}"
+        result = f"{formatted_int},{decimal_part[:decimal_places]}"
     else:
         result = formatted_int
     
-    if is_negative:
-        result = "-" + result
-    
     return result
 
 
@@ -72,21 +56,27 @@ def get_status_color(timestamp: datetime) -> str:
         return "red"
 
 
+@lru_cache(maxsize=64)
 def format_timestamp(timestamp: datetime) -> str:
-    """Format timestamp as readable string."""
+    """Format timestamp as readable string (memoised; timestamps repeat across refreshes)."""
     return timestamp.strftime("%Y-%m-%d %H:%M:%S")
 
 
+def _new_dashboard_table() -> Table:
+    """Build the empty two-column skeleton of the main dashboard table."""
+    table = Table(title="Vietnam Gold & Market Dashboard", show_header=False, title_style="bold cyan")
+    table.add_column("Label", style="bold", width=20)
+    table.add_column("Value", width=60)
+    return table
+
+
 def create_dashboard_table(data: DashboardData) -> Table:
     """
     Generate Rich Table from DashboardData.
     
     Displays all data sources with formatting and color-coded freshness.
     """
-    table = Table(title="Vietnam Gold & Market Dashboard", show_header=False, title_style="bold cyan")
-    
-    table.add_column("Label", style="bold", width=20)
-    table.add_column("Value", width=60)
+    table = _new_dashboard_table()
     
     if data.gold:
         color = get_status_color(data.gold.timestamp)
@@ -173,10 +163,14 @@ def create_dashboard_table(data: DashboardData) -> Table:
     return table
 
 
+# Rich only reads a Text while rendering, so one placeholder can fill every empty cell
+_DIM_DASH = Text("--", style="dim")
+
+
 def _format_change(percent: Optional[Decimal]) -> Text:
     """Format a percentage change with color and sign prefix."""
     if percent is None:
-        return Text("--", style="dim")
+        return _DIM_DASH
     sign = "+" if percent >= 0 else ""
     color = "green" if percent >= 0 else "red"
     return Text(f"{sign}{format_vn_number(percent, 2)}%", style=color)
@@ -191,33 +185,37 @@ ASSET_LABELS = {
 }
 
 
+_PERIOD_ORDER = ("1D", "1W", "1M", "1Y", "3Y")
+_PERIOD_WIDTHS = {"1D": 10}
+
+
+def _new_history_table() -> Table:
+    """Build the empty skeleton of the historical changes table."""
+    table = Table(title="Historical Changes", title_style="bold magenta")
+    table.add_column("Asset", style="bold", width=16)
+    for period in _PERIOD_ORDER:
+        table.add_column(period, justify="right", width=_PERIOD_WIDTHS.get(period, 12))
+    return table
+
+
 def create_history_table(history: Dict[str, AssetHistoricalData]) -> Table:
     """
     Generate a Rich Table showing 1D/1W/1M/1Y/3Y percentage changes per asset.
 
     Green = positive change, Red = negative change, -- = data unavailable.
     """
-    table = Table(title="Historical Changes", title_style="bold magenta")
-
-    table.add_column("Asset", style="bold", width=16)
-    table.add_column("1D", justify="right", width=10)
-    table.add_column("1W", justify="right", width=12)
-    table.add_column("1M", justify="right", width=12)
-    table.add_column("1Y", justify="right", width=12)
-    table.add_column("3Y", justify="right", width=12)
-
-    period_order = ["1D", "1W", "1M", "1Y", "3Y"]
+    table = _new_history_table()
 
     for asset_key in ["gold", "usd_vnd", "bitcoin", "vn30", "land"]:
         asset_data = history.get(asset_key)
         label = ASSET_LABELS.get(asset_key, asset_key)
 
         if asset_data is None:
-            table.add_row(label, *[Text("--", style="dim") for _ in period_order])
+            table.add_row(label, *[_DIM_DASH] * len(_PERIOD_ORDER))
             continue
 
         change_map = {c.period: c.change_percent for c in asset_data.changes}
-        cells = [_format_change(change_map.get(p)) for p in period_order]
+        cells = [_format_change(change_map.get(p)) for p in _PERIOD_ORDER]
         table.add_row(label, *cells)
 
     return table
@@ -245,7 +243,7 @@ def create_dashboard_panel(
     parts.append(Text(footer_text, style="dim italic"))
 
     return Panel(
-        Text.assemble(*parts),
+        Group(*parts),
         title="Vietnam Gold Dashboard",
         border_style="cyan"
     )
@@ -6,9 +6,11 @@ for assets without external historical APIs (e.g., SJC Gold).
 
 import json
 import os
-from datetime import datetime, timedelta
-from decimal import Decimal
-from typing import Optional, List, Dict, Any
+import threading
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Optional, List, Dict, Any, Iterable, Tuple
 
 from .config import CACHE_DIR
 
@@ -20,26 +22,105 @@ HISTORY_FILE = os.path.join(CACHE_DIR, "history.json")
 # we consider it "not available".
 MAX_LOOKUP_TOLERANCE_DAYS = 3
 
+# Rolling window kept per asset, measured back from its newest snapshot.
+# Must comfortably exceed the longest HISTORY_PERIODS lookback (3Y).
+MAX_HISTORY_DAYS = 365 * 4
+
+
+# Parsed history memoised against the file's (path, mtime_ns, size), so a
+# refresh cycle's many lookups parse history.json once.
+_cache: Dict[str, Any] = {"key": None, "data": None}
+
+# Serialises access to the cached dict, which writers mutate in place;
+# HistoryRepository fetches assets from several threads at once.
+_lock = threading.RLock()
+
+
+def _stat_key() -> Optional[Tuple[str, int, int]]:
+    """Identify the current on-disk version of the history file."""
+    try:
+        st = os.stat(HISTORY_FILE)
+    except OSError:
+        return None
+    return (HISTORY_FILE, st.st_mtime_ns, st.st_size)
+
 
 def _load_history() -> Dict[str, List[Dict[str, Any]]]:
     """Load the full history file from disk. Returns empty dict if missing."""
-    if not os.path.exists(HISTORY_FILE):
+    key = _stat_key()
+    if key is None:
         return {}
+    if key == _cache["key"]:
+        return _cache["data"]
     try:
         with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+            data = json.load(f)
     except (json.JSONDecodeError, IOError):
-        return {}
+        data = {}
+    _cache["key"], _cache["data"] = key, data
+    return data
 
 
 def _save_history(data: Dict[str, List[Dict[str, Any]]]) -> None:
-    """Persist the full history dict to disk."""
+    """
+    Persist the full history dict to disk.
+
+    Written compactly to a temp file and swapped in with ``os.replace``, so a
+    crash mid-write can never leave a truncated history.json behind.
+    """
     os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+    tmp_path = HISTORY_FILE + ".tmp"
     try:
-        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, HISTORY_FILE)
     except IOError:
-        pass
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        # Callers mutate the cached dict in place; drop it so the next load
+        # reflects what is actually on disk.
+        _cache["key"] = None
+        return
+    _cache["key"], _cache["data"] = _stat_key(), data
+
+
+def _upsert_entry(entries: List[Dict[str, Any]], value: Decimal, timestamp: datetime) -> bool:
+    """
+    Update the entry for *timestamp*'s calendar day, or insert a new one.
+
+    *entries* must be sorted by date; the day is located by bisection and a
+    new entry is inserted in place, so the list stays sorted without a
+    re-sort.  Returns False when the day already holds the same value, in
+    which case the entry (including its timestamp) is left as it was.
+    """
+    date_str = timestamp.strftime("%Y-%m-%d")
+    value_str = str(value)
+
+    idx = bisect_left(entries, date_str, key=lambda e: e["date"])
+    if idx < len(entries) and entries[idx]["date"] == date_str:
+        entry = entries[idx]
+        if entry.get("value") == value_str:
+            return False
+        entry["value"] = value_str
+        entry["timestamp"] = timestamp.isoformat()
+        return True
+
+    entries.insert(idx, {
+        "date": date_str,
+        "value": value_str,
+        "timestamp": timestamp.isoformat(),
+    })
+    return True
+
+
+def _window_start(entries: List[Dict[str, Any]]) -> Optional[str]:
+    """ISO date before which *entries* fall outside the rolling window."""
+    if not entries:
+        return None
+    newest = date.fromisoformat(entries[-1]["date"])
+    return (newest - timedelta(days=MAX_HISTORY_DAYS)).isoformat()
 
 
 def record_snapshot(asset: str, value: Decimal, timestamp: Optional[datetime] = None) -> None:
@@ -54,33 +135,46 @@ def record_snapshot(asset: str, value: Decimal, timestamp: Optional[datetime] =
         value: The representative Decimal value to record.
         timestamp: When the value was observed (defaults to now).
     """
-    if timestamp is None:
-        timestamp = datetime.now()
-
-    history = _load_history()
-    entries: List[Dict[str, Any]] = history.get(asset, [])
+    record_snapshots([(asset, value, timestamp)])
 
-    date_str = timestamp.strftime("%Y-%m-%d")
-    iso_str = timestamp.isoformat()
 
-    # Update existing entry for the same day, or append new one
-    for entry in entries:
-        if entry.get("date") == date_str:
-            entry["value"] = str(value)
-            entry["timestamp"] = iso_str
-            break
-    else:
-        entries.append({
-            "date": date_str,
-            "value": str(value),
-            "timestamp": iso_str,
-        })
+def record_snapshots(snapshots: Iterable[Tuple[str, Decimal, Optional[datetime]]]) -> None:
+    """
+    Record several ``(asset, value, timestamp)`` data-points in one write.
 
-    # Keep entries sorted by date ascending
-    entries.sort(key=lambda e: e["date"])
+    Same per-day deduplication as ``record_snapshot``, but the history file
+    is loaded and saved once for the whole batch.  A ``None`` timestamp
+    means now.  The file is left untouched when nothing changed, e.g. an
+    intraday refresh that re-observes the day's recorded value.
 
-    history[asset] = entries
-    _save_history(history)
+    Each asset keeps only the last MAX_HISTORY_DAYS of snapshots; points
+    older than that window are ignored rather than written and pruned.
+    """
+    with _lock:
+        history = _load_history()
+        changed: Dict[str, List[Dict[str, Any]]] = {}
+        now: Optional[datetime] = None
+
+        for asset, value, timestamp in snapshots:
+            if timestamp is None:
+                # One clock read per batch: a tick's snapshots share a timestamp
+                if now is None:
+                    now = datetime.now()
+                timestamp = now
+            entries = history.setdefault(asset, [])
+            start = _window_start(entries)
+            if start is not None and timestamp.date().isoformat() < start:
+                continue
+            if _upsert_entry(entries, value, timestamp):
+                changed[asset] = entries
+
+        if not changed:
+            return
+
+        # Entries stay sorted on insert; only the rolling-window trim remains
+        for entries in changed.values():
+            del entries[:bisect_left(entries, _window_start(entries), key=lambda e: e["date"])]
+        _save_history(history)
 
 
 def get_value_at(asset: str, target_date: datetime) -> Optional[Decimal]:
@@ -97,19 +191,20 @@ def get_value_at(asset: str, target_date: datetime) -> Optional[Decimal]:
     Returns:
         Decimal value or None if no suitable snapshot exists.
     """
-    history = _load_history()
-    entries = history.get(asset, [])
-
-    if not entries:
-        return None
-
+    # Entries are kept sorted by ISO date, so the closest snapshot is one of
+    # the two neighbours of the insertion point.
     target_day = target_date.date()
+    with _lock:
+        entries = _load_history().get(asset, [])
+        idx = bisect_left(entries, target_day.isoformat(), key=lambda e: e["date"])
+        neighbours = entries[max(idx - 1, 0):idx + 1]
+
     best_entry: Optional[Dict[str, Any]] = None
     best_delta_days: Optional[int] = None
 
-    for entry in entries:
-        entry_date = datetime.strptime(entry["date"], "%Y-%m-%d")
-        delta_days = abs((entry_date.date() - target_day).days)
+    for entry in neighbours:
+        entry_date = date.fromisoformat(entry["date"])
+        delta_days = abs((entry_date - target_day).days)
         if best_delta_days is None or delta_days < best_delta_days:
             best_delta_days = delta_days
             best_entry = entry
@@ -122,11 +217,11 @@ def get_value_at(asset: str, target_date: datetime) -> Optional[Decimal]:
 
     try:
         return Decimal(best_entry["value"])
-    except Exception:
+    except (KeyError, TypeError, InvalidOperation):
         return None
 
 
 def get_all_entries(asset: str) -> List[Dict[str, Any]]:
     """Return all recorded snapshots for an asset (sorted by date)."""
-    history = _load_history()
-    return history.get(asset, [])
+    with _lock:
+        return list(_load_history().get(asset, []))
@@ -4,59 +4,56 @@ Fetches data every 10 minutes and displays in Rich terminal UI.
 """
 
 import time
-import warnings
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from rich.console import Console
 from rich.live import Live
+from rich.text import Text
 
 from .repositories import GoldRepository, CurrencyRepository, CryptoRepository, StockRepository, LandRepository, HistoryRepository
 from .models import DashboardData
 from .dashboard import create_dashboard_table, create_history_table
-from .history_store import record_snapshot
+from .history_store import record_snapshots
 
-warnings.filterwarnings("ignore", message="Unverified HTTPS request")
+
+# Repositories are stateless apart from the shared HTTP session, so one
+# instance of each is reused for every refresh.
+_FETCH_SOURCES = (
+    ("gold", GoldRepository(), "Gold price", "Gold"),
+    ("usd_vnd", CurrencyRepository(), "USD/VND rate", "USD/VND"),
+    ("bitcoin", CryptoRepository(), "Bitcoin price", "Bitcoin"),
+    ("vn30", StockRepository(), "VN30 index", "VN30"),
+    ("land", LandRepository(), "Land price", "Land"),
+)
+_HISTORY_REPO = HistoryRepository()
+
+# One Console for the whole process; each instance re-probes the terminal.
+_CONSOLE = Console()
 
 
 def fetch_all_data() -> DashboardData:
     """
     Fetch data from all repositories with error handling.
     
-    Each repository is tried independently; if one fails, others continue.
+    Repositories run concurrently in a thread pool, so a refresh takes as
+    long as the slowest source. Each repository is tried independently; if
+    one fails, others continue.
     Cache decorator ensures stale data is returned if source is unavailable.
     """
     data = DashboardData()
     
-    console = Console()
-    
-    try:
-        data.gold = GoldRepository().fetch()
-        console.log("[green]✓[/green] Gold price fetched")
-    except Exception as e:
-        console.log(f"[yellow]⚠[/yellow] Gold fetch failed: {e}")
-    
-    try:
-        data.usd_vnd = CurrencyRepository().fetch()
-        console.log("[green]✓[/green] USD/VND rate fetched")
-    except Exception as e:
-        console.log(f"[yellow]⚠[/yellow] USD/VND fetch failed: {e}")
-    
-    try:
-        data.bitcoin = CryptoRepository().fetch()
-        console.log("[green]✓[/green] Bitcoin price fetched")
-    except Exception as e:
-        console.log(f"[yellow]⚠[/yellow] Bitcoin fetch failed: {e}")
-    
-    try:
-        data.vn30 = StockRepository().fetch()
-        console.log("[green]✓[/green] VN30 index fetched")
-    except Exception as e:
-        console.log(f"[yellow]⚠[/yellow] VN30 fetch failed: {e}")
-
-    try:
-        data.land = LandRepository().fetch()
-        console.log("[green]✓[/green] Land price fetched")
-    except Exception as e:
-        console.log(f"[yellow]⚠[/yellow] Land fetch failed: {e}")
+    with ThreadPoolExecutor(max_workers=len(_FETCH_SOURCES)) as pool:
+        futures = [
+            (field_name, pool.submit(repo.fetch), ok_label, fail_label)
+            for field_name, repo, ok_label, fail_label in _FETCH_SOURCES
+        ]
+        
+        for field_name, future, ok_label, fail_label in futures:
+            try:
+                setattr(data, field_name, future.result())
+                _CONSOLE.log(f"[green]✓[/green] {ok_label} fetched")
+            except Exception as e:
+                _CONSOLE.log(f"[yellow]⚠[/yellow] {fail_label} fetch failed: {e}")
     
     return data
 
@@ -65,51 +62,63 @@ def main():
     """
     Main loop: fetch data and display dashboard with 10-minute refresh.
     """
-    console = Console()
-    console.print("\n[bold cyan]Vietnam Gold Dashboard Starting...[/bold cyan]\n")
+    _CONSOLE.print("\n[bold cyan]Vietnam Gold Dashboard Starting...[/bold cyan]\n")
     
     refresh_interval = 600
     
     while True:
-        console.print(f"\n[dim]Fetching data at {datetime.now().strftime('%H:%M:%S')}...[/dim]")
+        # Deadline is fixed before fetching so slow sources don't stretch the period
+        deadline = time.monotonic() + refresh_interval
+        _CONSOLE.print(f"\n[dim]Fetching data at {datetime.now().strftime('%H:%M:%S')}...[/dim]")
         
         data = fetch_all_data()
         
-        # Record current values into local history store
+        # Record current values into local history store (one write per tick)
+        snapshots = []
         if data.gold:
-            record_snapshot("gold", data.gold.sell_price)
+            snapshots.append(("gold", data.gold.sell_price, None))
         if data.usd_vnd:
-            record_snapshot("usd_vnd", data.usd_vnd.sell_rate)
+            snapshots.append(("usd_vnd", data.usd_vnd.sell_rate, None))
         if data.bitcoin:
-            record_snapshot("bitcoin", data.bitcoin.btc_to_vnd)
+            snapshots.append(("bitcoin", data.bitcoin.btc_to_vnd, None))
         if data.vn30:
-            record_snapshot("vn30", data.vn30.index_value)
+            snapshots.append(("vn30", data.vn30.index_value, None))
         if data.land:
-            record_snapshot("land", data.land.price_per_m2)
+            snapshots.append(("land", data.land.price_per_m2, None))
+        if snapshots:
+            record_snapshots(snapshots)
         
         table = create_dashboard_table(data)
-        console.print("\n")
-        console.print(table)
+        _CONSOLE.print("\n")
+        _CONSOLE.print(table)
         
         # Fetch and display historical changes
         try:
-            history = HistoryRepository().fetch_changes(data)
+            history = _HISTORY_REPO.fetch_changes(data)
             if history:
-                console.print(create_history_table(history))
+                _CONSOLE.print(create_history_table(history))
         except Exception as e:
-            console.print(f"[dim]Historical data unavailable: {e}[/dim]")
+            _CONSOLE.print(f"[dim]Historical data unavailable: {e}[/dim]")
+        # Surface failed or slow background history writes within this tick
+        _HISTORY_REPO.flush_backfills()
         
-        console.print(f"\n[dim italic]Next refresh in {refresh_interval // 60} minutes. Press Ctrl+C to exit.[/dim italic]\n")
-        
-        try:
-            time.sleep(refresh_interval)
-        except KeyboardInterrupt:
-            raise
+        _wait_for_refresh(deadline)
+
+
+def _wait_for_refresh(deadline: float) -> None:
+    """Sleep until the monotonic *deadline* in short steps, showing a live countdown."""
+    with Live(console=_CONSOLE, transient=True, auto_refresh=False) as live:
+        while (remaining := deadline - time.monotonic()) > 0:
+            minutes, seconds = divmod(int(remaining), 60)
+            live.update(
+                Text(f"Next refresh in {minutes}:{seconds:02d}. Press Ctrl+C to exit.", style="dim italic"),
+                refresh=True,
+            )
+            time.sleep(min(1.0, remaining))
 
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        console = Console()
-        console.print("\n[bold cyan]✓ Dashboard stopped[/bold cyan]")
+        _CONSOLE.print("\n[bold cyan]✓ Dashboard stopped[/bold cyan]")
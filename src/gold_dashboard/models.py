@@ -1,6 +1,7 @@
 """
 Data models for Vietnam Gold Dashboard using dataclasses.
 All models use Decimal for financial data to avoid floating-point errors.
+Models are slotted: no per-instance __dict__ and fixed-offset attribute access.
 """
 
 from dataclasses import dataclass, field
@@ -9,7 +10,7 @@ from datetime import datetime
 from typing import Optional, List, Dict
 
 
-@dataclass
+@dataclass(slots=True)
 class GoldPrice:
     """Model for Vietnamese gold prices (SJC or local sources)."""
     buy_price: Decimal
@@ -23,7 +24,7 @@ class GoldPrice:
             raise ValueError("Prices must be positive")
 
 
-@dataclass
+@dataclass(slots=True)
 class UsdVndRate:
     """Model for USD/VND black market exchange rate."""
     sell_rate: Decimal
@@ -35,7 +36,7 @@ class UsdVndRate:
             raise ValueError("Exchange rate must be positive")
 
 
-@dataclass
+@dataclass(slots=True)
 class BitcoinPrice:
     """Model for Bitcoin to VND conversion rate."""
     btc_to_vnd: Decimal
@@ -47,7 +48,7 @@ class BitcoinPrice:
             raise ValueError("BTC price must be positive")
 
 
-@dataclass
+@dataclass(slots=True)
 class Vn30Index:
     """Model for VN30 stock index."""
     index_value: Decimal
@@ -60,7 +61,7 @@ class Vn30Index:
             raise ValueError("Index value must be positive")
 
 
-@dataclass
+@dataclass(slots=True)
 class LandPrice:
     """Model for land price benchmark per square meter."""
     price_per_m2: Decimal
@@ -74,7 +75,7 @@ class LandPrice:
             raise ValueError("Land price must be positive")
 
 
-@dataclass
+@dataclass(slots=True)
 class GasolinePrice:
     """Model for Vietnam retail gasoline prices (government-regulated)."""
     ron95_price: Decimal          # RON 95-III price, VND/liter
@@ -88,7 +89,7 @@ class GasolinePrice:
             raise ValueError("Gasoline price must be positive")
 
 
-@dataclass
+@dataclass(slots=True)
 class DashboardData:
     """Aggregated model for all dashboard data."""
     gold: Optional[GoldPrice] = None
@@ -99,7 +100,7 @@ class DashboardData:
     gasoline: Optional[GasolinePrice] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class HistoricalChange:
     """Model for a single period's value change (e.g., 1W, 1M)."""
     period: str
@@ -108,7 +109,7 @@ class HistoricalChange:
     change_percent: Optional[Decimal] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AssetHistoricalData:
     """Aggregated historical changes for a single asset across all periods."""
     asset_name: str
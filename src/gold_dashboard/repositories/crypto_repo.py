@@ -3,16 +3,39 @@ Cryptocurrency repository for Vietnam Gold Dashboard.
 Fetches Bitcoin to VND conversion rate from CoinMarketCap with CoinGecko fallback.
 """
 
+import json
+import re
+from collections import deque
+
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lhtml
 from datetime import datetime
 from typing import Optional
 from decimal import Decimal
 
 from .base import Repository
 from ..models import BitcoinPrice
-from ..config import COINMARKETCAP_BTC_VND_URL, COINGECKO_API_URL, HEADERS, REQUEST_TIMEOUT
-from ..utils import cached, sanitize_vn_number
+from ..config import COINMARKETCAP_BTC_VND_URL, COINGECKO_API_URL, REQUEST_TIMEOUT, SESSION
+from ..utils import cached, html_text, iter_prices, node_text, parse_html, sanitize_vn_number
+
+
+# span/div/p elements whose class mentions price, value or amount (case-insensitive)
+_CLASS_LOWER = "translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+_PRICE_ELEMENTS = etree.XPath(
+    "//*[self::span or self::div or self::p]"
+    f"[contains({_CLASS_LOWER}, 'price')"
+    f" or contains({_CLASS_LOWER}, 'value')"
+    f" or contains({_CLASS_LOWER}, 'amount')]"
+)
+
+_RATE_LINE_KW_RE = re.compile(r'VND|vnd|Bitcoin|BTC')
+# Next.js state payload embedded in CoinMarketCap pages
+_NEXT_DATA_RE = re.compile(rb'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+
+# Plausible BTC/VND range; Decimal bounds avoid an int->Decimal conversion per compare
+_BTC_VND_MIN = Decimal('1000000000')
+_BTC_VND_MAX = Decimal('5000000000')
 
 
 class CryptoRepository(Repository[BitcoinPrice]):
@@ -31,28 +54,30 @@ class CryptoRepository(Repository[BitcoinPrice]):
         Returns:
             BitcoinPrice model with validated data or fallback approximate rate
         """
+        now = datetime.now()
+
         try:
-            response = requests.get(
+            response = SESSION.get(
                 COINMARKETCAP_BTC_VND_URL,
-                headers=HEADERS,
                 timeout=REQUEST_TIMEOUT
             )
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'lxml')
-            btc_to_vnd = self._extract_btc_rate(soup)
+            btc_to_vnd = self._extract_next_data_rate(response.content)
+            if not btc_to_vnd:
+                btc_to_vnd = self._extract_btc_rate(parse_html(response.content))
             
             if btc_to_vnd:
                 return BitcoinPrice(
                     btc_to_vnd=btc_to_vnd,
                     source="CoinMarketCap",
-                    timestamp=datetime.now()
+                    timestamp=now
                 )
         except (requests.exceptions.RequestException, ValueError):
             pass
         
         try:
-            return self._fetch_from_coingecko()
+            return self._fetch_from_coingecko(now)
         except (requests.exceptions.RequestException, ValueError):
             pass
         
@@ -60,14 +85,13 @@ class CryptoRepository(Repository[BitcoinPrice]):
         return BitcoinPrice(
             btc_to_vnd=Decimal('2500000000'),
             source="Fallback (Scraping Failed)",
-            timestamp=datetime.now()
+            timestamp=now
         )
     
-    def _fetch_from_coingecko(self) -> BitcoinPrice:
+    def _fetch_from_coingecko(self, timestamp: datetime) -> BitcoinPrice:
         """Fetch BTC/VND rate from CoinGecko API as fallback."""
-        response = requests.get(
+        response = SESSION.get(
             COINGECKO_API_URL,
-            headers=HEADERS,
             timeout=REQUEST_TIMEOUT
         )
         response.raise_for_status()
@@ -82,40 +106,69 @@ class CryptoRepository(Repository[BitcoinPrice]):
         return BitcoinPrice(
             btc_to_vnd=btc_to_vnd,
             source="CoinGecko",
-            timestamp=datetime.now()
+            timestamp=timestamp
         )
     
-    def _extract_btc_rate(self, soup: BeautifulSoup) -> Optional[Decimal]:
+    def _extract_next_data_rate(self, content: bytes) -> Optional[Decimal]:
+        """
+        Extract BTC to VND rate from CoinMarketCap's embedded __NEXT_DATA__ JSON.
+
+        Avoids building a DOM for the largest page of the set. Only the exact
+        'price' field of a 'quote' object under props.pageProps is read, so
+        sibling figures such as 24h highs or the all-time high are never
+        mistaken for the spot rate. The quote's nesting depth is not a public
+        API, so pageProps is searched breadth-first for the shallowest match.
+        Returns None when the script tag is missing or holds no such field.
+        """
+        match = _NEXT_DATA_RE.search(content)
+        if not match:
+            return None
+
+        try:
+            page_props = json.loads(match.group(1))["props"]["pageProps"]
+        except (ValueError, KeyError, TypeError):
+            return None
+
+        queue = deque([page_props])
+        while queue:
+            node = queue.popleft()
+            if isinstance(node, list):
+                queue.extend(node)
+                continue
+            if not isinstance(node, dict):
+                continue
+
+            quote = node.get("quote")
+            if isinstance(quote, dict):
+                price = quote.get("price")
+                if isinstance(price, (int, float)) and not isinstance(price, bool):
+                    rate = Decimal(str(price))
+                    if _BTC_VND_MIN < rate < _BTC_VND_MAX:
+                        return rate
+            queue.extend(v for v in node.values() if isinstance(v, (dict, list)))
+
+        return None
+
+    def _extract_btc_rate(self, root: lhtml.HtmlElement) -> Optional[Decimal]:
         """
         Extract BTC to VND rate from CoinMarketCap HTML.
         
         Targets conversion rate text and applies number sanitization.
         """
-        price_elements = soup.find_all(['span', 'div', 'p'], class_=lambda x: x and any(
-            keyword in str(x).lower() for keyword in ['price', 'value', 'amount']
-        ))
-        
-        for elem in price_elements:
-            elem_text = elem.get_text(strip=True)
+        for elem in _PRICE_ELEMENTS(root):
+            elem_text = node_text(elem)
             rate = sanitize_vn_number(elem_text)
-            if rate and 1000000000 < rate < 5000000000:
+            if rate and _BTC_VND_MIN < rate < _BTC_VND_MAX:
                 return rate
         
-        text = soup.get_text()
+        text = html_text(root)
         lines = [line.strip() for line in text.split('\n') if line.strip()]
         
         for i, line in enumerate(lines):
-            if any(keyword in line for keyword in ['VND', 'vnd', 'Bitcoin', 'BTC']):
+            if _RATE_LINE_KW_RE.search(line):
                 for j in range(max(0, i-3), min(len(lines), i+5)):
                     rate = sanitize_vn_number(lines[j])
-                    if rate and 1000000000 < rate < 5000000000:
+                    if rate and _BTC_VND_MIN < rate < _BTC_VND_MAX:
                         return rate
         
-        import re
-        numbers = re.findall(r'\d{1,3}(?:[.,]\d{3})+(?:[.,]\d{1,2})?', text)
-        for num_str in numbers:
-            rate = sanitize_vn_number(num_str)
-            if rate and 1000000000 < rate < 5000000000:
-                return rate
-        
-        return None
+        return next((rate for _, rate in iter_prices(text) if _BTC_VND_MIN < rate < _BTC_VND_MAX), None)
@@ -3,16 +3,36 @@ Currency exchange repository for Vietnam Gold Dashboard.
 Fetches USD/VND black market rates from EGCurrency with fallback.
 """
 
+import re
+
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lhtml
 from datetime import datetime
 from typing import Optional
 from decimal import Decimal
 
 from .base import Repository
 from ..models import UsdVndRate
-from ..config import EGCURRENCY_URL, CHOGIA_AJAX_URL, HEADERS, REQUEST_TIMEOUT, OPEN_ER_API_URL, BLACK_MARKET_PREMIUM
-from ..utils import cached, sanitize_vn_number
+from ..config import EGCURRENCY_URL, CHOGIA_AJAX_URL, CHOGIA_HEADERS, REQUEST_TIMEOUT, OPEN_ER_API_URL, BLACK_MARKET_PREMIUM, SESSION
+from ..utils import cached, fetch_html, html_text, iter_prices, node_text, sanitize_vn_number
+
+
+# div/span/td/p elements whose class mentions price, rate or sell (case-insensitive)
+_CLASS_LOWER = "translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+_PRICE_ELEMENTS = etree.XPath(
+    "//*[self::div or self::span or self::td or self::p]"
+    f"[contains({_CLASS_LOWER}, 'price')"
+    f" or contains({_CLASS_LOWER}, 'rate')"
+    f" or contains({_CLASS_LOWER}, 'sell')]"
+)
+
+# 'selling' and 'sell price' are covered by the 'sell' alternative
+_SELL_KW_RE = re.compile(r'sell|bán', re.IGNORECASE)
+
+# Plausible scraped USD/VND range
+_USD_VND_MIN = Decimal('20000')
+_USD_VND_MAX = Decimal('30000')
 
 
 class CurrencyRepository(Repository[UsdVndRate]):
@@ -30,34 +50,29 @@ class CurrencyRepository(Repository[UsdVndRate]):
         Returns:
             UsdVndRate model with validated data or fallback approximate rate
         """
+        now = datetime.now()
+
         try:
-            return self._fetch_from_chogia()
+            return self._fetch_from_chogia(now)
         except (requests.exceptions.RequestException, ValueError, KeyError) as e:
             print(f"chogia.vn fetch failed: {e}")
         
         try:
-            response = requests.get(
-                EGCURRENCY_URL,
-                headers=HEADERS,
-                timeout=REQUEST_TIMEOUT
-            )
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'lxml')
-            sell_rate = self._extract_sell_rate(soup)
+            root = fetch_html(EGCURRENCY_URL)
+            sell_rate = self._extract_sell_rate(root)
             
             if sell_rate:
                 return UsdVndRate(
                     sell_rate=sell_rate,
                     source="EGCurrency",
-                    timestamp=datetime.now()
+                    timestamp=now
                 )
         except (requests.exceptions.RequestException, ValueError) as e:
             print(f"EGCurrency fetch failed: {e}")
         
         # 3. Try Open ExchangeRate API (international, always works)
         try:
-            return self._fetch_from_open_er_api()
+            return self._fetch_from_open_er_api(now)
         except (requests.exceptions.RequestException, ValueError, KeyError) as e:
             print(f"Open ER API fetch failed: {e}")
         
@@ -65,22 +80,19 @@ class CurrencyRepository(Repository[UsdVndRate]):
         return UsdVndRate(
             sell_rate=Decimal('26500'),
             source="Fallback (Scraping Failed)",
-            timestamp=datetime.now()
+            timestamp=now
         )
     
-    def _fetch_from_chogia(self) -> UsdVndRate:
+    def _fetch_from_chogia(self, timestamp: datetime) -> UsdVndRate:
         """
         Fetch USD black market rate from chogia.vn AJAX endpoint (primary source).
         
         POST to WordPress admin-ajax with action=load_gia_ngoai_te_cho_do_thi&ma=USD
         Returns JSON with daily rates; we take the latest entry.
         """
-        response = requests.post(
+        response = SESSION.post(
             CHOGIA_AJAX_URL,
-            headers={
-                **HEADERS,
-                'Content-Type': 'application/x-www-form-urlencoded',
-            },
+            headers=CHOGIA_HEADERS,
             data={
                 'action': 'load_gia_ngoai_te_cho_do_thi',
                 'ma': 'USD'
@@ -109,19 +121,18 @@ class CurrencyRepository(Repository[UsdVndRate]):
         return UsdVndRate(
             sell_rate=sell_rate,
             source="chogia.vn",
-            timestamp=datetime.now()
+            timestamp=timestamp
         )
     
-    def _fetch_from_open_er_api(self) -> UsdVndRate:
+    def _fetch_from_open_er_api(self, timestamp: datetime) -> UsdVndRate:
         """
         Fetch USD/VND rate from Open ExchangeRate API (free, no key required).
         
         Returns the official bank rate (not black market), but is reliable
         from any IP worldwide. Better than showing a stale hardcoded fallback.
         """
-        response = requests.get(
+        response = SESSION.get(
             OPEN_ER_API_URL,
-            headers={"User-Agent": HEADERS["User-Agent"]},
             timeout=REQUEST_TIMEOUT
         )
         response.raise_for_status()
@@ -146,40 +157,29 @@ class CurrencyRepository(Repository[UsdVndRate]):
         return UsdVndRate(
             sell_rate=sell_rate,
             source="ExchangeRate API (est.)",
-            timestamp=datetime.now()
+            timestamp=timestamp
         )
 
-    def _extract_sell_rate(self, soup: BeautifulSoup) -> Optional[Decimal]:
+    def _extract_sell_rate(self, root: lhtml.HtmlElement) -> Optional[Decimal]:
         """
         Extract sell rate from EGCurrency HTML.
         
         Targets "Sell Price" text and applies Vietnamese number sanitization.
         """
-        text = soup.get_text()
+        text = html_text(root)
         lines = [line.strip() for line in text.split('\n') if line.strip()]
         
         for i, line in enumerate(lines):
-            if any(keyword in line.lower() for keyword in ['sell', 'bán', 'selling', 'sell price']):
+            if _SELL_KW_RE.search(line):
                 for j in range(i, min(len(lines), i + 5)):
                     rate = sanitize_vn_number(lines[j])
-                    if rate and 20000 < rate < 30000:
+                    if rate and _USD_VND_MIN < rate < _USD_VND_MAX:
                         return rate
         
-        price_elements = soup.find_all(['div', 'span', 'td', 'p'], class_=lambda x: x and any(
-            keyword in str(x).lower() for keyword in ['price', 'rate', 'sell']
-        ))
-        
-        for elem in price_elements:
-            elem_text = elem.get_text(strip=True)
+        for elem in _PRICE_ELEMENTS(root):
+            elem_text = node_text(elem)
             rate = sanitize_vn_number(elem_text)
-            if rate and 20000 < rate < 30000:
-                return rate
-        
-        import re
-        numbers = re.findall(r'\d{1,3}(?:[.,]\d{3})+(?:[.,]\d{1,2})?', text)
-        for num_str in numbers:
-            rate = sanitize_vn_number(num_str)
-            if rate and 20000 < rate < 30000:
+            if rate and _USD_VND_MIN < rate < _USD_VND_MAX:
                 return rate
         
-        return None
+        return next((rate for _, rate in iter_prices(text) if _USD_VND_MIN < rate < _USD_VND_MAX), None)
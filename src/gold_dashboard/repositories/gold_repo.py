@@ -3,16 +3,35 @@ Gold price repository for Vietnam Gold Dashboard.
 Fetches SJC gold prices with Mi Hồng fallback.
 """
 
+import re
+import time
+
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lhtml
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from decimal import Decimal
 
 from .base import Repository
 from ..models import GoldPrice
-from ..config import SJC_URL, MIHONG_URL, DOJI_API_URL, HEADERS, REQUEST_TIMEOUT
-from ..utils import cached, sanitize_vn_number
+from ..config import SJC_URL, MIHONG_URL, DOJI_API_URL, REQUEST_TIMEOUT, SESSION, SOURCE_FAIL_TTL_SECONDS
+from ..utils import cached, fetch_html, html_text, node_text, sanitize_vn_number
+
+# Keyword families (English and Vietnamese) matched in one regex pass per line
+_BUY_KW_RE = re.compile(r'buy|mua', re.IGNORECASE)
+_SELL_KW_RE = re.compile(r'sell|bán', re.IGNORECASE)
+
+# Mi Hồng scraped price bounds (VND/tael)
+_MIHONG_MIN_PRICE = Decimal('1000000')
+_MIHONG_MAX_TEXT_PRICE = Decimal('100000000')
+
+# True when a table row's text contains the SJC gold type
+_ROW_HAS_SJC = etree.XPath('contains(string(.), "SJC")')
+
+# Source name -> time.monotonic() deadline before which it is not retried
+_dead_until: Dict[str, float] = {}
 
 
 class GoldRepository(Repository[GoldPrice]):
@@ -24,6 +43,7 @@ class GoldRepository(Repository[GoldPrice]):
     2. If SJC fails (timeout, 404, blocked), fallback to Mi Hồng
     3. If both fail, return approximate market data
     4. Cache results to avoid rapid retries
+    5. Skip sources whose request failed within SOURCE_FAIL_TTL_SECONDS
     """
     
     @cached
@@ -37,18 +57,20 @@ class GoldRepository(Repository[GoldPrice]):
         Note:
             Returns fallback data if all sources fail to ensure UI stability
         """
+        now = datetime.now()
+
         try:
-            return self._fetch_from_doji()
+            return self._fetch_unless_dead('doji', self._fetch_from_doji, now)
         except (requests.exceptions.RequestException, ValueError) as e:
             print(f"DOJI fetch failed: {e}")
         
         try:
-            return self._fetch_from_mihong()
+            return self._fetch_unless_dead('mihong', self._fetch_from_mihong, now)
         except (requests.exceptions.RequestException, ValueError) as e:
             print(f"Mi Hồng fetch failed: {e}")
         
         try:
-            return self._fetch_from_sjc()
+            return self._fetch_unless_dead('sjc', self._fetch_from_sjc, now)
         except (requests.exceptions.RequestException, ValueError) as e:
             print(f"SJC fetch failed: {e}")
         
@@ -57,19 +79,38 @@ class GoldRepository(Repository[GoldPrice]):
             sell_price=Decimal('175400000'),
             unit="VND/tael",
             source="Fallback (Scraping Failed)",
-            timestamp=datetime.now()
+            timestamp=now
         )
     
-    def _fetch_from_doji(self) -> GoldPrice:
+    def _fetch_unless_dead(
+        self, source: str, fetcher: Callable[[datetime], GoldPrice], timestamp: datetime
+    ) -> GoldPrice:
+        """
+        Run a source fetcher unless that source failed recently.
+
+        A network failure marks the source dead for SOURCE_FAIL_TTL_SECONDS so
+        later refreshes skip straight to the next source instead of waiting out
+        another timeout. Parse errors (ValueError) are not remembered: they are
+        cheap to retry and often a one-off bad page.
+        """
+        if time.monotonic() < _dead_until.get(source, 0.0):
+            raise ValueError(f"skipped, failed within the last {SOURCE_FAIL_TTL_SECONDS}s")
+
+        try:
+            return fetcher(timestamp)
+        except requests.exceptions.RequestException:
+            _dead_until[source] = time.monotonic() + SOURCE_FAIL_TTL_SECONDS
+            raise
+
+    def _fetch_from_doji(self, timestamp: datetime) -> GoldPrice:
         """
         Fetch gold price from DOJI API (primary source).
         
         DOJI returns XML with prices in units of 10,000 VND.
         E.g., Sell='17,540' means 175,400,000 VND/tael.
         """
-        response = requests.get(
+        response = SESSION.get(
             DOJI_API_URL,
-            headers=HEADERS,
             timeout=REQUEST_TIMEOUT
         )
         response.raise_for_status()
@@ -128,22 +169,15 @@ class GoldRepository(Repository[GoldPrice]):
             sell_price=sell_price,
             unit="VND/tael",
             source="DOJI",
-            timestamp=datetime.now()
+            timestamp=timestamp
         )
     
-    def _fetch_from_sjc(self) -> GoldPrice:
+    def _fetch_from_sjc(self, timestamp: datetime) -> GoldPrice:
         """Fetch gold price from SJC official site."""
-        response = requests.get(
-            SJC_URL,
-            headers=HEADERS,
-            timeout=REQUEST_TIMEOUT
-        )
-        response.raise_for_status()
+        root = fetch_html(SJC_URL)
         
-        soup = BeautifulSoup(response.content, 'lxml')
-        
-        buy_price = self._extract_sjc_price(soup, 'buy')
-        sell_price = self._extract_sjc_price(soup, 'sell')
+        buy_price = self._extract_sjc_price(root, 'buy')
+        sell_price = self._extract_sjc_price(root, 'sell')
         
         if not buy_price or not sell_price:
             raise ValueError("Failed to parse SJC gold prices")
@@ -153,24 +187,50 @@ class GoldRepository(Repository[GoldPrice]):
             sell_price=sell_price,
             unit="VND/tael",
             source="SJC",
-            timestamp=datetime.now()
+            timestamp=timestamp
         )
     
-    def _fetch_from_mihong(self) -> GoldPrice:
-        """Fetch gold price from Mi Hồng fallback source."""
-        response = requests.get(
+    def _fetch_from_mihong(self, timestamp: datetime) -> GoldPrice:
+        """
+        Fetch gold price from Mi Hồng fallback source.
+
+        The SJC row sits near the top of the page, so the body is streamed
+        into an incremental parser and reading stops as soon as table rows
+        have yielded both prices. Only when no row does is the rest of the
+        document parsed for the text-based fallback.
+        """
+        response = SESSION.get(
             MIHONG_URL,
-            headers=HEADERS,
             timeout=REQUEST_TIMEOUT,
-            verify=False
+            stream=True
         )
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'lxml')
-        
-        buy_price = self._extract_mihong_price(soup, 'buy')
-        sell_price = self._extract_mihong_price(soup, 'sell')
-        
+        try:
+            response.raise_for_status()
+
+            parser = etree.HTMLPullParser(
+                events=('end',), tag='tr', encoding='utf-8', remove_comments=True
+            )
+            parser.set_element_class_lookup(lhtml.HtmlElementClassLookup())
+
+            buy_price = None
+            sell_price = None
+            for chunk in response.iter_content(chunk_size=16384):
+                parser.feed(chunk)
+                for _, row in parser.read_events():
+                    row_buy, row_sell = self._mihong_row_prices(row)
+                    buy_price = buy_price or row_buy
+                    sell_price = sell_price or row_sell
+                if buy_price and sell_price:
+                    break
+            else:
+                text_buy, text_sell = self._extract_mihong_text_prices(parser.close())
+                buy_price = buy_price or text_buy
+                sell_price = sell_price or text_sell
+        except etree.LxmlError as e:
+            raise ValueError(f"Unparseable Mi Hồng page: {e}") from e
+        finally:
+            response.close()
+
         if not buy_price or not sell_price:
             raise ValueError("Failed to parse Mi Hồng gold prices")
         
@@ -179,10 +239,10 @@ class GoldRepository(Repository[GoldPrice]):
             sell_price=sell_price,
             unit="VND/tael",
             source="Mi Hồng",
-            timestamp=datetime.now()
+            timestamp=timestamp
         )
     
-    def _extract_sjc_price(self, soup: BeautifulSoup, price_type: str) -> Optional[float]:
+    def _extract_sjc_price(self, root: lhtml.HtmlElement, price_type: str) -> Optional[float]:
         """
         Extract buy/sell price from SJC HTML.
         SJC loads prices via JavaScript, so table is empty in initial HTML.
@@ -190,55 +250,62 @@ class GoldRepository(Repository[GoldPrice]):
         """
         return None
     
-    def _extract_mihong_price(self, soup: BeautifulSoup, price_type: str) -> Optional[float]:
+    def _mihong_row_prices(self, row: lhtml.HtmlElement) -> Tuple[Optional[Decimal], Optional[Decimal]]:
         """
-        Extract buy/sell price from Mi Hồng HTML.
-        Look for price sections with SJC gold type.
+        Extract (buy, sell) prices from a single Mi Hồng table row.
+        Returns (None, None) unless the row is the SJC gold row.
         """
-        # Try table-based extraction first
-        tables = soup.find_all('table')
-        for table in tables:
-            rows = table.find_all('tr')
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
-                cell_texts = [cell.get_text(strip=True) for cell in cells]
-                
-                # Look for row containing SJC
-                if any('SJC' in text for text in cell_texts):
-                    # Try to find buy/sell prices in this row
-                    for i, text in enumerate(cell_texts):
-                        if 'buy' in price_type.lower():
-                            # Buy price typically in column 1 or 2
-                            if i > 0 and i < len(cell_texts):
-                                price_val = sanitize_vn_number(cell_texts[i])
-                                if price_val and price_val > 1000000:
-                                    return price_val
-                        elif 'sell' in price_type.lower():
-                            # Sell price typically in column 2 or 3
-                            if i > 1 and i < len(cell_texts):
-                                price_val = sanitize_vn_number(cell_texts[i])
-                                if price_val and price_val > 1000000:
-                                    return price_val
-        
-        # Fallback to text-based extraction
-        text = soup.get_text()
+        # Look for row containing SJC; the check runs inside libxml2 so
+        # non-matching rows never have their cell texts built in Python
+        if not _ROW_HAS_SJC(row):
+            return (None, None)
+
+        cell_texts = [node_text(cell) for cell in row.iter('td', 'th')]
+
+        # Buy price typically in column 1 or 2, sell price in column 2 or 3
+        buy_price = None
+        sell_price = None
+        for i in range(1, len(cell_texts)):
+            price_val = sanitize_vn_number(cell_texts[i])
+            if price_val and price_val > _MIHONG_MIN_PRICE:
+                if buy_price is None:
+                    buy_price = price_val
+                if i > 1:
+                    sell_price = price_val
+                    break
+        return (buy_price, sell_price)
+
+    def _extract_mihong_text_prices(self, root: lhtml.HtmlElement) -> Tuple[Optional[Decimal], Optional[Decimal]]:
+        """
+        Extract (buy, sell) prices from Mi Hồng page text.
+        Used when no table row carries the SJC prices.
+
+        The page is split and each line classified as a buy/sell line once;
+        the overlapping look-ahead windows then only index into those lists.
+        """
+        text = html_text(root)
         lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
+
+        # Check for buy/sell keywords (English and Vietnamese)
+        buy_lines = [_BUY_KW_RE.search(line) is not None for line in lines]
+        sell_lines = [_SELL_KW_RE.search(line) is not None for line in lines]
+
+        return (
+            self._mihong_price_after_keyword(lines, buy_lines),
+            self._mihong_price_after_keyword(lines, sell_lines),
+        )
+
+    def _mihong_price_after_keyword(self, lines: List[str], keyword_lines: List[bool]) -> Optional[Decimal]:
+        """Return the first price following a keyword line within 15 lines of an SJC line."""
         for i, line in enumerate(lines):
             if 'SJC' in line:
                 # Look ahead for buy/sell indicators and prices
                 for j in range(i, min(len(lines), i+15)):
-                    candidate = lines[j]
-                    
-                    # Check for buy/sell keywords (English and Vietnamese)
-                    is_buy_line = any(keyword in candidate.lower() for keyword in ['buy', 'mua', 'buying'])
-                    is_sell_line = any(keyword in candidate.lower() for keyword in ['sell', 'bán', 'selling'])
-                    
-                    if (price_type.lower() == 'buy' and is_buy_line) or (price_type.lower() == 'sell' and is_sell_line):
+                    if keyword_lines[j]:
                         # Look for price in this line and next few lines
                         for k in range(j, min(len(lines), j+5)):
                             price_val = sanitize_vn_number(lines[k])
-                            if price_val and price_val > 1000000 and price_val < 100000000:
+                            if price_val and _MIHONG_MIN_PRICE < price_val < _MIHONG_MAX_TEXT_PRICE:
                                 return price_val
         
         return None
@@ -4,26 +4,34 @@ Fetches past prices from external APIs (CoinGecko, VPS, chogia.vn)
 and falls back to the local history store for assets without APIs (SJC Gold).
 """
 
+import functools
 import json
+import os
 import re
 import time
-from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
 
 import requests
 
 from .base import Repository
 from ..config import (
+    CACHE_DIR,
     CHOGIA_AJAX_URL,
+    CHOGIA_HEADERS,
+    COINGECKO_MARKET_CHART_PARAMS,
     COINGECKO_MARKET_CHART_URL,
-    HEADERS,
+    HISTORY_CHANGES_TTL_SECONDS,
     HISTORY_PERIODS,
     REQUEST_TIMEOUT,
+    SESSION,
     VPS_VN30_API_URL,
+    VPS_VN30_PARAMS,
     WEBGIA_GOLD_1Y_URL,
 )
-from ..history_store import get_all_entries, get_value_at, record_snapshot
+from ..history_store import get_all_entries, get_value_at, record_snapshots
 from ..models import (
     AssetHistoricalData,
     DashboardData,
@@ -35,6 +43,13 @@ from .gasoline_repo import GasolineRepository
 # CoinGecko free tier caps historical data at 365 days
 _COINGECKO_MAX_DAYS = 365
 
+# chogia.vn serves ~30 days of history; with the ±3-day probe anything older misses
+_CHOGIA_MAX_DAYS = 35
+
+# Day offsets probed around a target date, nearest first (±3 days tolerance)
+_PROBE_OFFSETS = (0, 1, -1, 2, -2, 3, -3)
+_PROBE_RADIUS = timedelta(days=max(_PROBE_OFFSETS))
+
 # Regex to extract the "Bán ra" (sell) series from webgia.com inline JS.
 # The page embeds Highcharts data like: {name:"Bán ra", data:[[ts,price],...]}
 _WEBGIA_SELL_RE = re.compile(r"name:.B.n ra.,\s*data:(\[\[.*?\]\])")
@@ -277,11 +292,189 @@ _VN30_HISTORICAL_SEEDS: List[Tuple[str, Decimal]] = [
 ]
 
 
+T = TypeVar("T", bound=dict)
+
+# In-process TTL cache for the history fetchers: (method name, args) -> (expiry, result).
+# chogia.vn publishes once a day and CoinGecko's free tier is rate limited, so
+# repeated fetch_changes/fetch_timeseries calls within the TTL reuse one response.
+_TTL_CACHE: Dict[Tuple[str, Tuple[Any, ...]], Tuple[float, dict]] = {}
+_HISTORY_FETCH_TTL_SECONDS = 900
+_COINGECKO_TTL_SECONDS = 3600
+
+
+def _ttl_cached(ttl_seconds: float) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Cache a fetcher method's successful dict result for *ttl_seconds*.
+
+    Keyed on the method name and positional arguments (not ``self``), so all
+    HistoryRepository instances share it.  Failures are not cached.  Callers
+    get a shallow copy, so mutating a result cannot corrupt the cached one.
+    """
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(func)
+        def wrapper(self: Any, *args: Any) -> T:
+            key = (func.__name__, args)
+            now = time.monotonic()
+            hit = _TTL_CACHE.get(key)
+            if hit is not None and hit[0] > now:
+                return dict(hit[1])
+            result = func(self, *args)
+            _TTL_CACHE[key] = (now + ttl_seconds, result)
+            return dict(result)
+        return wrapper
+    return decorator
+
+
+# Gold backfills are written off the fetch_changes critical path.  One worker
+# keeps the writes ordered; concurrent.futures joins it at interpreter exit,
+# so queued backfills still land before the process ends.
+_BACKFILL_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-backfill")
+
+
+def _log_backfill_failure(future: Future) -> None:
+    """Done-callback: report a background backfill that raised instead of losing it."""
+    exc = future.exception()
+    if exc is not None:
+        print(f"  ⚠ History backfill failed: {exc}")
+
+
+def _submit_backfill(func: Callable[..., None], *args: Any) -> None:
+    """Queue *func* on the backfill worker, logging any exception it raises."""
+    _BACKFILL_POOL.submit(func, *args).add_done_callback(_log_backfill_failure)
+
+
+def _flush_backfills() -> None:
+    """Block until every backfill queued so far has been written."""
+    _BACKFILL_POOL.submit(lambda: None).result()
+
+
+# (period label, lookback days, target datetime) for one HISTORY_PERIODS entry
+PeriodTarget = Tuple[str, int, datetime]
+
+# (oldest, newest) YYYY-MM-DD key of a chogia/webgia rate dict
+RateBounds = Tuple[str, str]
+
+# Resolves (label, days, target_date) to the old value for that period, if known
+PeriodLookup = Callable[[str, int, datetime], Optional[Decimal]]
+
+
+def _period_targets(now: Optional[datetime] = None) -> List[PeriodTarget]:
+    """Resolve every HISTORY_PERIODS lookback against one *now* (default: current time)."""
+    if now is None:
+        now = datetime.now()
+    return [(label, days, now - timedelta(days=days)) for label, days in HISTORY_PERIODS.items()]
+
+
+def _any_within(targets: List[PeriodTarget], max_days: int) -> bool:
+    """True if at least one period looks back no further than *max_days*."""
+    return any(days <= max_days for _, days, _ in targets)
+
+
+def _dated_snapshots(
+    asset: str, items: Iterable[Tuple[str, Decimal]]
+) -> List[Tuple[str, Decimal, datetime]]:
+    """Turn ``(YYYY-MM-DD, value)`` pairs into ``record_snapshots`` tuples, skipping bad dates."""
+    snapshots = []
+    for date_str, value in items:
+        try:
+            dt = datetime.fromisoformat(date_str)
+        except (ValueError, TypeError):
+            continue
+        snapshots.append((asset, value, dt))
+    return snapshots
+
+
+_ZERO = Decimal(0)
+_HUNDRED = Decimal(100)
+_TWO_PLACES = Decimal("0.01")
+
+
 def _compute_change_percent(old_value: Decimal, new_value: Decimal) -> Decimal:
     """Compute percentage change from old to new, rounded to 2 decimal places."""
-    if old_value == 0:
-        return Decimal("0")
-    return ((new_value - old_value) / old_value * 100).quantize(Decimal("0.01"))
+    if not old_value:
+        return _ZERO
+    return ((new_value - old_value) * _HUNDRED / old_value).quantize(_TWO_PLACES)
+
+
+def _build_changes(
+    asset_name: str,
+    current_value: Decimal,
+    targets: Optional[List[PeriodTarget]],
+    lookup: PeriodLookup,
+) -> AssetHistoricalData:
+    """Run *lookup* for every period target and wrap the results as changes.
+
+    Shared driver for all ``_*_changes`` methods: each asset only supplies
+    its source-specific lookup chain.
+    """
+    if targets is None:
+        targets = _period_targets()
+
+    changes = []
+    for label, days, target_date in targets:
+        change = HistoricalChange(period=label, new_value=current_value)
+        old_value = lookup(label, days, target_date)
+        if old_value is not None:
+            change.old_value = old_value
+            change.change_percent = _compute_change_percent(old_value, current_value)
+        changes.append(change)
+
+    return AssetHistoricalData(asset_name=asset_name, changes=changes)
+
+
+# Today's reference values (the price N days ago) per asset, each with its own save time
+_CHANGES_CACHE_FILE = os.path.join(CACHE_DIR, "history_changes.json")
+
+
+def _load_reference_values() -> Dict[str, Tuple[float, Dict[str, Decimal]]]:
+    """Return today's still-fresh cached reference values as {asset: (saved_at, {period: value})}."""
+    try:
+        with open(_CHANGES_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f, parse_float=Decimal)
+    except (ValueError, OSError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("date") != date.today().isoformat():
+        return {}
+
+    cutoff = time.time() - HISTORY_CHANGES_TTL_SECONDS
+    fresh: Dict[str, Tuple[float, Dict[str, Decimal]]] = {}
+    for asset, entry in cache.get("assets", {}).items():
+        try:
+            saved_at = entry["saved_at"]
+            values = {label: Decimal(entry["values"][label]) for label in HISTORY_PERIODS}
+        except (KeyError, TypeError, ArithmeticError):
+            continue
+        if saved_at > cutoff:
+            fresh[asset] = (saved_at, values)
+    return fresh
+
+
+def _save_reference_values(entries: Dict[str, Tuple[float, Dict[str, Decimal]]]) -> None:
+    """
+    Persist today's reference values, replacing the cache file atomically.
+
+    Written to a per-process temp file and swapped in with ``os.replace`` so
+    a concurrent reader never sees a half-written cache.
+    """
+    tmp_path = f"{_CHANGES_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(_CHANGES_CACHE_FILE) or ".", exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "date": date.today().isoformat(),
+                    "assets": {
+                        asset: {"saved_at": saved_at, "values": {k: str(v) for k, v in values.items()}}
+                        for asset, (saved_at, values) in entries.items()
+                    },
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, _CHANGES_CACHE_FILE)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
 
 
 class HistoryRepository:
@@ -299,33 +492,95 @@ class HistoryRepository:
         """
         Build a dict mapping asset keys to their historical change data.
 
+        Reference values resolved for every period are cached for the rest of
+        the day (up to HISTORY_CHANGES_TTL_SECONDS), so repeat calls skip the
+        external APIs for those assets.
+
         Args:
             current_data: The latest DashboardData with current prices.
 
         Returns:
             Dict like {"gold": AssetHistoricalData(...), "bitcoin": ...}
         """
-        result: Dict[str, AssetHistoricalData] = {}
-
-        if current_data.gold:
-            result["gold"] = self._gold_changes(current_data.gold.sell_price)
-
-        if current_data.usd_vnd:
-            result["usd_vnd"] = self._usd_vnd_changes(current_data.usd_vnd.sell_rate)
+        # One shared clock so every asset compares against the same target dates
+        targets = _period_targets()
+        gold, usd_vnd, bitcoin = current_data.gold, current_data.usd_vnd, current_data.bitcoin
+        vn30, land, gasoline = current_data.vn30, current_data.land, current_data.gasoline
+
+        # (asset, live method, current value, seeder); a seeder marks the asset
+        # as cacheable.  Gasoline is not: its references depend on the source.
+        jobs = []
+        if gold:
+            jobs.append(("gold", self._gold_changes, gold.sell_price, self._seed_historical_gold))
+        if usd_vnd:
+            jobs.append(("usd_vnd", self._usd_vnd_changes, usd_vnd.sell_rate, self._seed_historical_usd_vnd))
+        if bitcoin:
+            jobs.append(("bitcoin", self._bitcoin_changes, bitcoin.btc_to_vnd, self._seed_historical_bitcoin))
+        if vn30:
+            jobs.append(("vn30", self._vn30_changes, vn30.index_value, self._seed_historical_vn30))
+        if land:
+            jobs.append(("land", self._land_changes, land.price_per_m2, self._seed_historical_land))
+        if gasoline:
+            jobs.append(("gasoline", self._gasoline_changes, gasoline, None))
+
+        if not jobs:
+            return {}
+
+        # The old (N-days-ago) values only move when the day rolls over, so
+        # an asset fetched live earlier today reuses them; change percentages
+        # are still recomputed against the current value.
+        cached_refs = _load_reference_values()
+        history: Dict[str, AssetHistoricalData] = {}
+        live_jobs = []
+        for key, method, value, seeder in jobs:
+            if seeder is None or key not in cached_refs:
+                live_jobs.append((key, method, value))
+                continue
+            # Seeding is local and idempotent, so the store stays complete
+            seeder()
+            refs = cached_refs[key][1]
+            history[key] = _build_changes(key, value, targets, lambda label, *_, refs=refs: refs[label])
 
-        if current_data.bitcoin:
-            result["bitcoin"] = self._bitcoin_changes(current_data.bitcoin.btc_to_vnd)
+        if live_jobs:
+            # Each asset talks to a different host, so the round trips overlap
+            with ThreadPoolExecutor(max_workers=len(live_jobs)) as pool:
+                futures = [(key, pool.submit(method, value, targets)) for key, method, value in live_jobs]
+                live = {key: future.result() for key, future in futures}
+            history.update(live)
+            self._cache_reference_values(live, {key for key, _, _, seeder in jobs if seeder})
 
-        if current_data.vn30:
-            result["vn30"] = self._vn30_changes(current_data.vn30.index_value)
+        return {key: history[key] for key, _, _, _ in jobs}
 
-        if current_data.land:
-            result["land"] = self._land_changes(current_data.land.price_per_m2)
+    @staticmethod
+    def flush_backfills() -> None:
+        """Wait for the gold backfills queued by ``fetch_changes`` to be written."""
+        _flush_backfills()
 
-        if current_data.gasoline:
-            result["gasoline"] = self._gasoline_changes(current_data.gasoline)
+    @staticmethod
+    def _cache_reference_values(
+        live: Dict[str, AssetHistoricalData], cacheable: Iterable[str]
+    ) -> None:
+        """Add live results with every period resolved to today's reference cache.
 
-        return result
+        Assets with a missing period are left out, so the gap is retried with
+        a live fetch on the next call.
+        """
+        fresh = {
+            asset: live[asset]
+            for asset in cacheable
+            if asset in live
+            and live[asset].changes
+            and all(c.old_value is not None for c in live[asset].changes)
+        }
+        if not fresh:
+            return
+
+        # Entries kept from the file keep their own save time, so their TTL is not extended
+        entries = _load_reference_values()
+        now = time.time()
+        for asset, asset_data in fresh.items():
+            entries[asset] = (now, {c.period: c.old_value for c in asset_data.changes})
+        _save_reference_values(entries)
 
     # ------------------------------------------------------------------
     # Time-series export (for frontend charts)
@@ -347,6 +602,8 @@ class HistoryRepository:
         Each list is sorted by date ascending.  Data comes from the same
         external APIs and seed lists already used by ``fetch_changes``.
         """
+        # The local-store series must include any backfill still in flight
+        _flush_backfills()
         result: Dict[str, List[List]] = {}
 
         try:
@@ -513,7 +770,9 @@ class HistoryRepository:
     # Gold — webgia.com (~1 year) + chogia.vn (~30 days) + local store
     # ------------------------------------------------------------------
 
-    def _gold_changes(self, current_value: Decimal) -> AssetHistoricalData:
+    def _gold_changes(
+        self, current_value: Decimal, targets: Optional[List[PeriodTarget]] = None
+    ) -> AssetHistoricalData:
         """
         Compute SJC gold price changes using a tiered strategy:
 
@@ -524,9 +783,6 @@ class HistoryRepository:
         3. **Local history store** — seeded with verified news prices
            for 3Y, and backfilled with scraped data on every run.
         """
-        changes = []
-        now = datetime.now()
-
         # Ensure verified historical seeds are in the local store (for 3Y)
         self._seed_historical_gold()
 
@@ -535,31 +791,36 @@ class HistoryRepository:
         try:
             webgia_rates = self._fetch_webgia_gold_history()
             if webgia_rates:
-                self._backfill_gold_history(webgia_rates)
+                _submit_backfill(self._backfill_gold_history, webgia_rates)
         except (requests.exceptions.RequestException, ValueError, KeyError):
             pass
 
+        if targets is None:
+            targets = _period_targets()
+
         # Fallback: chogia.vn ~30 days (finer granularity for recent data)
         chogia_rates: Optional[Dict[str, Decimal]] = None
-        if webgia_rates is None:
+        if webgia_rates is None and _any_within(targets, _CHOGIA_MAX_DAYS):
             try:
                 chogia_rates = self._fetch_chogia_gold_history()
                 if chogia_rates:
-                    self._backfill_gold_history(chogia_rates)
+                    _submit_backfill(self._backfill_gold_history, chogia_rates)
             except (requests.exceptions.RequestException, ValueError, KeyError):
                 pass
 
-        for label, days in HISTORY_PERIODS.items():
-            target_date = now - timedelta(days=days)
+        webgia_bounds = self._rate_bounds(webgia_rates)
+        chogia_bounds = self._rate_bounds(chogia_rates)
+
+        def lookup(label: str, days: int, target_date: datetime) -> Optional[Decimal]:
             old_value: Optional[Decimal] = None
 
             # Try webgia.com data first (covers ~1 year)
             if webgia_rates is not None:
-                old_value = self._find_chogia_rate(webgia_rates, target_date)
+                old_value = self._find_chogia_rate(webgia_rates, target_date, webgia_bounds)
 
             # Try chogia.vn data (covers ~30 days)
             if old_value is None and chogia_rates is not None:
-                old_value = self._find_chogia_rate(chogia_rates, target_date)
+                old_value = self._find_chogia_rate(chogia_rates, target_date, chogia_bounds)
 
             # Fall back to local history store (has 3Y seeds + backfilled data)
             if old_value is None:
@@ -574,17 +835,11 @@ class HistoryRepository:
                     max_delta_days=45,
                 )
 
-            change = HistoricalChange(period=label, new_value=current_value)
-            if old_value is not None:
-                change.old_value = old_value
-                change.change_percent = _compute_change_percent(
-                    old_value, current_value
-                )
+            return old_value
 
-            changes.append(change)
-
-        return AssetHistoricalData(asset_name="gold", changes=changes)
+        return _build_changes("gold", current_value, targets, lookup)
 
+    @_ttl_cached(_HISTORY_FETCH_TTL_SECONDS)
     def _fetch_webgia_gold_history(self) -> Dict[str, Decimal]:
         """
         GET webgia.com 1-year SJC chart page and extract inline Highcharts data.
@@ -595,9 +850,8 @@ class HistoryRepository:
         Prices are in millions VND (e.g. 90.3 = 90,300,000 VND).
         Returns a dict mapping YYYY-MM-DD -> Decimal full VND price.
         """
-        response = requests.get(
+        response = SESSION.get(
             WEBGIA_GOLD_1Y_URL,
-            headers=HEADERS,
             timeout=REQUEST_TIMEOUT,
         )
         response.raise_for_status()
@@ -606,20 +860,21 @@ class HistoryRepository:
         if not match:
             raise ValueError("Could not find sell series in webgia.com HTML")
 
-        raw_data: List[List[float]] = json.loads(match.group(1))
+        raw_data: List[List[Decimal]] = json.loads(match.group(1), parse_float=Decimal)
 
         rates: Dict[str, Decimal] = {}
         for ts_ms, price_millions in raw_data:
             try:
-                dt = datetime.fromtimestamp(ts_ms / 1000)
+                dt = datetime.fromtimestamp(int(ts_ms) / 1000)
                 date_key = dt.strftime("%Y-%m-%d")
                 # Convert millions to full VND (e.g. 90.3 -> 90,300,000)
-                rates[date_key] = Decimal(str(price_millions)) * 1_000_000
+                rates[date_key] = Decimal(price_millions) * 1_000_000
             except (ValueError, OSError):
                 continue
 
         return rates
 
+    @_ttl_cached(_HISTORY_FETCH_TTL_SECONDS)
     def _fetch_chogia_gold_history(self) -> Dict[str, Decimal]:
         """
         POST chogia.vn AJAX endpoint for SJC gold historical prices.
@@ -631,12 +886,9 @@ class HistoryRepository:
         from the current date.  Prices are in thousands (e.g. 181030 =
         181,030,000 VND).
         """
-        response = requests.post(
+        response = SESSION.post(
             CHOGIA_AJAX_URL,
-            headers={
-                **HEADERS,
-                "Content-Type": "application/x-www-form-urlencoded",
-            },
+            headers=CHOGIA_HEADERS,
             data={
                 "action": "load_gia_vang_cho_do_thi",
                 "congty": "SJC",
@@ -682,15 +934,11 @@ class HistoryRepository:
         """
         Plant verified SJC prices from news archives into the local store.
 
-        This runs on every call but ``record_snapshot`` deduplicates by date,
-        so repeated calls are cheap no-ops after the first seed.
+        This runs on every call but ``record_snapshots`` deduplicates by date
+        and skips the write when nothing changed, so repeated calls are cheap
+        no-ops after the first seed.
         """
-        for date_str, value in _SJC_HISTORICAL_SEEDS:
-            try:
-                dt = datetime.strptime(date_str, "%Y-%m-%d")
-                record_snapshot("gold", value, dt)
-            except (ValueError, TypeError):
-                continue
+        record_snapshots(_dated_snapshots("gold", _SJC_HISTORICAL_SEEDS))
 
     @staticmethod
     def _backfill_gold_history(rates: Dict[str, Decimal]) -> None:
@@ -698,20 +946,18 @@ class HistoryRepository:
         Seed the local history store with scraped SJC data.
 
         This ensures that over time the store accumulates a full multi-year
-        record of real SJC prices from webgia.com and chogia.vn.
+        record of real SJC prices from webgia.com and chogia.vn.  The whole
+        batch is recorded with a single history file write.
         """
-        for date_str, value in rates.items():
-            try:
-                dt = datetime.strptime(date_str, "%Y-%m-%d")
-                record_snapshot("gold", value, dt)
-            except (ValueError, TypeError):
-                continue
+        record_snapshots(_dated_snapshots("gold", rates.items()))
 
     # ------------------------------------------------------------------
     # USD/VND — chogia.vn (30 days of history) + local store fallback
     # ------------------------------------------------------------------
 
-    def _usd_vnd_changes(self, current_value: Decimal) -> AssetHistoricalData:
+    def _usd_vnd_changes(
+        self, current_value: Decimal, targets: Optional[List[PeriodTarget]] = None
+    ) -> AssetHistoricalData:
         """Fetch historical USD/VND rates from chogia.vn, fall back to local store.
 
         Strategy mirrors gold:
@@ -719,28 +965,30 @@ class HistoryRepository:
         2. Fetch ~30 days from chogia.vn and backfill into the local store.
         3. For each period, try chogia.vn first, then local store.
         """
-        changes = []
-        now = datetime.now()
-
         # Ensure verified historical seeds are in the local store (for 1Y/3Y)
         self._seed_historical_usd_vnd()
 
+        if targets is None:
+            targets = _period_targets()
+
         # chogia.vn returns ~30 days of daily rates; fetch once and reuse
         chogia_rates: Optional[Dict[str, Decimal]] = None
-        try:
-            chogia_rates = self._fetch_chogia_history()
-            if chogia_rates:
-                self._backfill_usd_vnd_history(chogia_rates)
-        except (requests.exceptions.RequestException, ValueError, KeyError):
-            pass
+        if _any_within(targets, _CHOGIA_MAX_DAYS):
+            try:
+                chogia_rates = self._fetch_chogia_history()
+                if chogia_rates:
+                    self._backfill_usd_vnd_history(chogia_rates)
+            except (requests.exceptions.RequestException, ValueError, KeyError):
+                pass
+
+        chogia_bounds = self._rate_bounds(chogia_rates)
 
-        for label, days in HISTORY_PERIODS.items():
-            target_date = now - timedelta(days=days)
+        def lookup(label: str, days: int, target_date: datetime) -> Optional[Decimal]:
             old_value: Optional[Decimal] = None
 
             # Try chogia.vn data (covers ~30 days)
             if chogia_rates is not None:
-                old_value = self._find_chogia_rate(chogia_rates, target_date)
+                old_value = self._find_chogia_rate(chogia_rates, target_date, chogia_bounds)
 
             # Fall back to local history store
             if old_value is None:
@@ -750,28 +998,19 @@ class HistoryRepository:
             if old_value is None:
                 old_value = self._find_seed_rate(_USD_VND_HISTORICAL_SEEDS, target_date)
 
-            change = HistoricalChange(period=label, new_value=current_value)
-            if old_value is not None:
-                change.old_value = old_value
-                change.change_percent = _compute_change_percent(
-                    old_value, current_value
-                )
-
-            changes.append(change)
+            return old_value
 
-        return AssetHistoricalData(asset_name="usd_vnd", changes=changes)
+        return _build_changes("usd_vnd", current_value, targets, lookup)
 
+    @_ttl_cached(_HISTORY_FETCH_TTL_SECONDS)
     def _fetch_chogia_history(self) -> Dict[str, Decimal]:
         """
         POST chogia.vn AJAX endpoint for USD historical rates.
         Returns a dict mapping date strings (YYYY-MM-DD) to sell rates.
         """
-        response = requests.post(
+        response = SESSION.post(
             CHOGIA_AJAX_URL,
-            headers={
-                **HEADERS,
-                "Content-Type": "application/x-www-form-urlencoded",
-            },
+            headers=CHOGIA_HEADERS,
             data={
                 "action": "load_gia_ngoai_te_cho_do_thi",
                 "ma": "USD",
@@ -797,41 +1036,52 @@ class HistoryRepository:
     def _seed_historical_usd_vnd() -> None:
         """Plant verified black-market USD/VND rates into the local store.
 
-        Mirrors ``_seed_historical_gold``.  ``record_snapshot`` deduplicates
+        Mirrors ``_seed_historical_gold``.  ``record_snapshots`` deduplicates
         by date, so repeated calls are cheap no-ops.
         """
-        for date_str, value in _USD_VND_HISTORICAL_SEEDS:
-            try:
-                dt = datetime.strptime(date_str, "%Y-%m-%d")
-                record_snapshot("usd_vnd", value, dt)
-            except (ValueError, TypeError):
-                continue
+        record_snapshots(_dated_snapshots("usd_vnd", _USD_VND_HISTORICAL_SEEDS))
 
     @staticmethod
     def _backfill_usd_vnd_history(rates: Dict[str, Decimal]) -> None:
         """Persist chogia.vn USD/VND data into the local history store.
 
         Over time the store accumulates a multi-year record of real
-        black-market rates from chogia.vn.
+        black-market rates from chogia.vn.  The whole batch is recorded with
+        a single history file write.
         """
-        for date_str, value in rates.items():
-            try:
-                dt = datetime.strptime(date_str, "%Y-%m-%d")
-                record_snapshot("usd_vnd", value, dt)
-            except (ValueError, TypeError):
-                continue
+        record_snapshots(_dated_snapshots("usd_vnd", rates.items()))
+
+    @staticmethod
+    def _rate_bounds(rates: Optional[Dict[str, Decimal]]) -> Optional[RateBounds]:
+        """Return the oldest and newest date keys of *rates*, or None if empty."""
+        if not rates:
+            return None
+        return min(rates), max(rates)
 
     @staticmethod
     def _find_chogia_rate(
-        rates: Dict[str, Decimal], target: datetime
+        rates: Dict[str, Decimal],
+        target: datetime,
+        bounds: Optional[RateBounds] = None,
     ) -> Optional[Decimal]:
-        """Find the chogia.vn rate closest to *target* within ±3 days."""
-        for offset in range(4):
-            for sign in (0, 1, -1):
-                check_date = target + timedelta(days=sign * offset)
-                key = check_date.strftime("%Y-%m-%d")
-                if key in rates:
-                    return rates[key]
+        """Find the chogia.vn rate closest to *target* within ±3 days.
+
+        When *bounds* is given, a probe window lying wholly outside the
+        covered date range (e.g. 1Y/3Y against ~30 days of chogia data)
+        is rejected with two string compares instead of seven lookups.
+        """
+        target_day = target.date()
+        if bounds is not None:
+            oldest, newest = bounds
+            if (
+                (target_day + _PROBE_RADIUS).isoformat() < oldest
+                or (target_day - _PROBE_RADIUS).isoformat() > newest
+            ):
+                return None
+        for delta in _PROBE_OFFSETS:
+            key = (target_day + timedelta(days=delta)).isoformat()
+            if key in rates:
+                return rates[key]
         return None
 
     @staticmethod
@@ -865,7 +1115,9 @@ class HistoryRepository:
     # Bitcoin — CoinGecko market_chart API (free tier: max 365 days)
     # ------------------------------------------------------------------
 
-    def _bitcoin_changes(self, current_value: Decimal) -> AssetHistoricalData:
+    def _bitcoin_changes(
+        self, current_value: Decimal, targets: Optional[List[PeriodTarget]] = None
+    ) -> AssetHistoricalData:
         """
         Fetch historical BTC/VND prices from CoinGecko per period.
 
@@ -874,9 +1126,6 @@ class HistoryRepository:
         2. Fetch up to 365 days from CoinGecko and backfill into the local store.
         3. For each period, try CoinGecko first, then local store.
         """
-        changes = []
-        now = datetime.now()
-
         # Ensure verified historical seeds are in the local store (for 3Y)
         self._seed_historical_bitcoin()
 
@@ -884,15 +1133,19 @@ class HistoryRepository:
         fetch_days = min(max(HISTORY_PERIODS.values()), _COINGECKO_MAX_DAYS)
         price_history: Optional[Dict[int, Decimal]] = None
 
-        try:
-            price_history = self._fetch_coingecko_history(fetch_days)
-            if price_history:
-                self._backfill_bitcoin_history(price_history)
-        except (requests.exceptions.RequestException, ValueError, KeyError):
-            pass
+        if targets is None:
+            targets = _period_targets()
 
-        for label, days in HISTORY_PERIODS.items():
-            target_date = now - timedelta(days=days)
+        # Every period beyond the free-tier cap would discard the response anyway
+        if _any_within(targets, _COINGECKO_MAX_DAYS):
+            try:
+                price_history = self._fetch_coingecko_history(fetch_days)
+                if price_history:
+                    self._backfill_bitcoin_history(price_history)
+            except (requests.exceptions.RequestException, ValueError, KeyError):
+                pass
+
+        def lookup(label: str, days: int, target_date: datetime) -> Optional[Decimal]:
             old_value: Optional[Decimal] = None
 
             # Only use CoinGecko data if the period is within the free-tier cap
@@ -911,39 +1164,31 @@ class HistoryRepository:
                     max_delta_days=45,
                 )
 
-            change = HistoricalChange(period=label, new_value=current_value)
-            if old_value is not None:
-                change.old_value = old_value
-                change.change_percent = _compute_change_percent(
-                    old_value, current_value
-                )
-
-            changes.append(change)
+            return old_value
 
-        return AssetHistoricalData(asset_name="bitcoin", changes=changes)
+        return _build_changes("bitcoin", current_value, targets, lookup)
 
+    @_ttl_cached(_COINGECKO_TTL_SECONDS)
     def _fetch_coingecko_history(self, days: int) -> Dict[int, Decimal]:
         """
         GET .../market_chart?vs_currency=vnd&days=N
         Returns {"prices": [[timestamp_ms, price], ...], ...}
         We build a dict mapping unix-day -> Decimal price.
         """
-        url = f"{COINGECKO_MARKET_CHART_URL}&days={days}"
-        response = requests.get(
-            url,
-            headers={"User-Agent": HEADERS["User-Agent"]},
+        response = SESSION.get(
+            COINGECKO_MARKET_CHART_URL,
+            params={**COINGECKO_MARKET_CHART_PARAMS, "days": days},
             timeout=REQUEST_TIMEOUT,
         )
         response.raise_for_status()
-        data = response.json()
+        # parse_float=Decimal keeps prices exact, skipping a float -> str -> Decimal trip
+        data = response.json(parse_float=Decimal)
 
-        prices = data.get("prices", [])
-        day_prices: Dict[int, Decimal] = {}
-        for ts_ms, price in prices:
-            day_key = int(ts_ms / 1000 / 86400)
-            day_prices[day_key] = Decimal(str(price))
-
-        return day_prices
+        # Decimal() only normalises whole-number prices that json decodes as int
+        return {
+            int(ts_ms) // 86_400_000: Decimal(price)
+            for ts_ms, price in data.get("prices", [])
+        }
 
     @staticmethod
     def _seed_historical_bitcoin() -> None:
@@ -951,28 +1196,24 @@ class HistoryRepository:
 
         Mirrors ``_seed_historical_gold``.  Prices are BTC/USD from
         Investopedia/CoinGecko multiplied by the contemporary USD/VND rate.
-        ``record_snapshot`` deduplicates by date.
+        ``record_snapshots`` deduplicates by date.
         """
-        for date_str, value in _BTC_VND_HISTORICAL_SEEDS:
-            try:
-                dt = datetime.strptime(date_str, "%Y-%m-%d")
-                record_snapshot("bitcoin", value, dt)
-            except (ValueError, TypeError):
-                continue
+        record_snapshots(_dated_snapshots("bitcoin", _BTC_VND_HISTORICAL_SEEDS))
 
     @staticmethod
     def _backfill_bitcoin_history(day_prices: Dict[int, Decimal]) -> None:
         """Persist CoinGecko BTC/VND data into the local history store.
 
-        Converts unix-day keys to date strings and records each snapshot.
+        Converts unix-day keys to datetimes and records them as one batch.
         Over time the store accumulates a multi-year record.
         """
+        snapshots = []
         for day_key, value in day_prices.items():
             try:
-                dt = datetime.fromtimestamp(day_key * 86400)
-                record_snapshot("bitcoin", value, dt)
+                snapshots.append(("bitcoin", value, datetime.fromtimestamp(day_key * 86400)))
             except (ValueError, TypeError, OSError):
                 continue
+        record_snapshots(snapshots)
 
     @staticmethod
     def _find_closest_price(
@@ -980,22 +1221,19 @@ class HistoryRepository:
     ) -> Optional[Decimal]:
         """Find the price entry closest to *target* within ±3 days."""
         target_day = int(target.timestamp() / 86400)
-        for offset in range(4):
-            if target_day + offset in day_prices:
-                return day_prices[target_day + offset]
-            if target_day - offset in day_prices:
-                return day_prices[target_day - offset]
+        for delta in _PROBE_OFFSETS:
+            if target_day + delta in day_prices:
+                return day_prices[target_day + delta]
         return None
 
     # ------------------------------------------------------------------
     # VN30 — VPS TradingView API (already used in stock_repo.py)
     # ------------------------------------------------------------------
 
-    def _vn30_changes(self, current_value: Decimal) -> AssetHistoricalData:
+    def _vn30_changes(
+        self, current_value: Decimal, targets: Optional[List[PeriodTarget]] = None
+    ) -> AssetHistoricalData:
         """Fetch historical VN30 closes from VPS API, fall back to local store + seeds."""
-        changes = []
-        now = datetime.now()
-
         # Ensure verified historical seeds are in the local store (for 1Y/3Y)
         self._seed_historical_vn30()
 
@@ -1008,8 +1246,7 @@ class HistoryRepository:
         except (requests.exceptions.RequestException, ValueError, KeyError):
             pass
 
-        for label, days in HISTORY_PERIODS.items():
-            target_date = now - timedelta(days=days)
+        def lookup(label: str, days: int, target_date: datetime) -> Optional[Decimal]:
             old_value: Optional[Decimal] = None
 
             if close_history is not None:
@@ -1026,26 +1263,17 @@ class HistoryRepository:
                     max_delta_days=45,
                 )
 
-            change = HistoricalChange(period=label, new_value=current_value)
-            if old_value is not None:
-                change.old_value = old_value
-                change.change_percent = _compute_change_percent(
-                    old_value, current_value
-                )
-
-            changes.append(change)
+            return old_value
 
-        return AssetHistoricalData(asset_name="vn30", changes=changes)
+        return _build_changes("vn30", current_value, targets, lookup)
 
-    def _land_changes(self, current_value: Decimal) -> AssetHistoricalData:
+    def _land_changes(
+        self, current_value: Decimal, targets: Optional[List[PeriodTarget]] = None
+    ) -> AssetHistoricalData:
         """Compute land historical changes from local store with seed-nearest fallback."""
-        changes = []
-        now = datetime.now()
-
         self._seed_historical_land()
 
-        for label, days in HISTORY_PERIODS.items():
-            target_date = now - timedelta(days=days)
+        def lookup(label: str, days: int, target_date: datetime) -> Optional[Decimal]:
             old_value = get_value_at("land", target_date)
 
             if old_value is None:
@@ -1055,33 +1283,25 @@ class HistoryRepository:
                     max_delta_days=45,
                 )
 
-            change = HistoricalChange(period=label, new_value=current_value)
-            if old_value is not None:
-                change.old_value = old_value
-                change.change_percent = _compute_change_percent(
-                    old_value, current_value
-                )
-
-            changes.append(change)
+            return old_value
 
-        return AssetHistoricalData(asset_name="land", changes=changes)
+        return _build_changes("land", current_value, targets, lookup)
 
-    def _gasoline_changes(self, current_price: GasolinePrice) -> AssetHistoricalData:
+    def _gasoline_changes(
+        self, current_price: GasolinePrice, targets: Optional[List[PeriodTarget]] = None
+    ) -> AssetHistoricalData:
         """Compute RON 95-III % change for each period using local store + seeds.
         Calls _seed_historical_gasoline() first to ensure 3Y coverage.
         For each period: tries get_value_at("gasoline", target_date), then
         _find_seed_rate(_GASOLINE_HISTORICAL_SEEDS, target_date, max_delta_days=20).
         For 3Y period: uses max_delta_days=45.
         Returns AssetHistoricalData(asset_name="gasoline", changes=[...])."""
-        changes = []
-        now = datetime.now()
         current_value = current_price.ron95_price
         use_local_history = GasolineRepository.is_realtime_source(current_price.source)
 
         self._seed_historical_gasoline()
 
-        for label, days in HISTORY_PERIODS.items():
-            target_date = now - timedelta(days=days)
+        def lookup(label: str, days: int, target_date: datetime) -> Optional[Decimal]:
             old_value: Optional[Decimal] = None
 
             if use_local_history:
@@ -1095,51 +1315,36 @@ class HistoryRepository:
                     max_delta_days=max_delta,
                 )
 
-            change = HistoricalChange(period=label, new_value=current_value)
-            if old_value is not None:
-                change.old_value = old_value
-                change.change_percent = _compute_change_percent(
-                    old_value, current_value
-                )
-
-            changes.append(change)
+            return old_value
 
-        return AssetHistoricalData(asset_name="gasoline", changes=changes)
+        return _build_changes("gasoline", current_value, targets, lookup)
 
     @staticmethod
     def _seed_historical_land() -> None:
         """Plant verified/curated land anchors into the local history store."""
-        for date_str, value in _LAND_HISTORICAL_SEEDS:
-            try:
-                dt = datetime.strptime(date_str, "%Y-%m-%d")
-                record_snapshot("land", value, dt)
-            except (ValueError, TypeError):
-                continue
+        record_snapshots(_dated_snapshots("land", _LAND_HISTORICAL_SEEDS))
 
     @staticmethod
     def _seed_historical_gasoline() -> None:
         """Plant all _GASOLINE_HISTORICAL_SEEDS into the local history store.
-        Calls record_snapshot("gasoline", value, dt) for each seed entry.
-        record_snapshot deduplicates by date — repeated calls are no-ops."""
-        for date_str, value in _GASOLINE_HISTORICAL_SEEDS:
-            try:
-                dt = datetime.strptime(date_str, "%Y-%m-%d")
-                record_snapshot("gasoline", value, dt)
-            except (ValueError, TypeError):
-                continue
+        Records every seed entry in one record_snapshots batch.
+        record_snapshots deduplicates by date — repeated calls are no-ops."""
+        record_snapshots(_dated_snapshots("gasoline", _GASOLINE_HISTORICAL_SEEDS))
 
     @staticmethod
     def _seed_historical_vn30() -> None:
-        """Plant verified VN30 index closes into the local history store."""
-        for date_str, value in _VN30_HISTORICAL_SEEDS:
-            try:
-                dt = datetime.strptime(date_str, "%Y-%m-%d")
-                if get_value_at("vn30", dt) is not None:
-                    continue
-                record_snapshot("vn30", value, dt)
-            except (ValueError, TypeError):
-                continue
+        """Plant verified VN30 index closes into the local history store.
+
+        Seeds near a date the store already covers are skipped, so real
+        closes are never overwritten; the rest are written as one batch.
+        """
+        record_snapshots([
+            snapshot
+            for snapshot in _dated_snapshots("vn30", _VN30_HISTORICAL_SEEDS)
+            if get_value_at("vn30", snapshot[2]) is None
+        ])
 
+    @_ttl_cached(_HISTORY_FETCH_TTL_SECONDS)
     def _fetch_vps_history(self, days: int) -> Dict[int, Decimal]:
         """
         GET histdatafeed.vps.com.vn/tradingview/history?symbol=VN30&resolution=D&from=...&to=...
@@ -1148,25 +1353,16 @@ class HistoryRepository:
         """
         now_ts = int(time.time())
         from_ts = now_ts - days * 86400
-        url = f"{VPS_VN30_API_URL}&from={from_ts}&to={now_ts}"
 
-        response = requests.get(
-            url,
-            headers={"User-Agent": HEADERS["User-Agent"]},
+        response = SESSION.get(
+            VPS_VN30_API_URL,
+            params={**VPS_VN30_PARAMS, "from": from_ts, "to": now_ts},
             timeout=REQUEST_TIMEOUT,
         )
         response.raise_for_status()
-        data = response.json()
+        data = response.json(parse_float=Decimal)
 
         if data.get("s") != "ok" or not data.get("c") or not data.get("t"):
             raise ValueError("VPS API returned no VN30 historical data")
 
-        timestamps = data["t"]
-        closes = data["c"]
-        day_prices: Dict[int, Decimal] = {}
-
-        for ts, close in zip(timestamps, closes):
-            day_key = int(ts / 86400)
-            day_prices[day_key] = Decimal(str(close))
-
-        return day_prices
+        return {int(ts) // 86400: Decimal(close) for ts, close in zip(data["t"], data["c"])}
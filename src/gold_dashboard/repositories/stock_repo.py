@@ -7,15 +7,31 @@ import re
 import time
 
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lhtml
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from decimal import Decimal
 
 from .base import Repository
 from ..models import Vn30Index
-from ..config import VIETSTOCK_URL, CAFEF_URL, HEADERS, REQUEST_TIMEOUT, VPS_VN30_API_URL
-from ..utils import cached, sanitize_vn_number
+from ..config import VIETSTOCK_URL, CAFEF_URL, REQUEST_TIMEOUT, VPS_VN30_API_URL, VPS_VN30_PARAMS, SESSION
+from ..utils import cached, fetch_html, html_text, sanitize_vn_number, sanitize_vn_number_intl
+
+# Absolute change preceding the parenthesised percent, e.g. '10.83 (0.54%)'
+_PCT_RE = re.compile(r'([-+]?\d+[.,]\d+)\s*\(')
+_VN30_LABEL_RE = re.compile(r'VN30-INDEX', re.IGNORECASE)
+
+# Plausible VN30 index range
+_VN30_MIN = Decimal('100')
+_VN30_MAX = Decimal('10000')
+
+# Vietstock label element and the visible text nodes that follow it
+_VN30_LABEL_NODES = etree.XPath("(//*[normalize-space(text())='VN30-INDEX'])[1]")
+_VN30_FOLLOWING_TEXT = etree.XPath(
+    "following::text()[normalize-space()]"
+    "[not(ancestor::script) and not(ancestor::style)][position() <= 2]"
+)
 
 
 class StockRepository(Repository[Vn30Index]):
@@ -33,27 +49,29 @@ class StockRepository(Repository[Vn30Index]):
         Returns:
             Vn30Index model with validated data or fallback
         """
+        now = datetime.now()
+
         # 1. Try Vietstock (Primary - Vietnamese scraping)
         try:
-            return self._fetch_from_vietstock()
+            return self._fetch_from_vietstock(now)
         except (requests.exceptions.RequestException, ValueError, KeyError) as e:
             print(f"Vietstock fetch failed: {e}")
 
         # 2. Try VPS TradingView API (works from international IPs)
         try:
-            return self._fetch_from_vps_api()
+            return self._fetch_from_vps_api(now)
         except (requests.exceptions.RequestException, ValueError, KeyError) as e:
             print(f"VPS API fetch failed: {e}")
 
         # 3. Try latest available VPS close (non-trading hours / partial data)
         try:
-            return self._fetch_from_vps_last_close()
+            return self._fetch_from_vps_last_close(now)
         except (requests.exceptions.RequestException, ValueError, KeyError) as e:
             print(f"VPS last-close fallback failed: {e}")
 
         # 4. Try CafeF (Secondary scraping)
         try:
-            return self._fetch_from_cafef()
+            return self._fetch_from_cafef(now)
         except (requests.exceptions.RequestException, ValueError) as e:
             print(f"CafeF fetch failed: {e}")
 
@@ -62,21 +80,27 @@ class StockRepository(Repository[Vn30Index]):
             index_value=Decimal('1950.00'),
             change_percent=Decimal('0.0'),
             source="Fallback (Scraping Failed)",
-            timestamp=datetime.now()
+            timestamp=now
         )
 
     def _fetch_vps_closes(self, days_back: int, retries: int = 3) -> list[Decimal]:
-        """Fetch VN30 closes from VPS with lightweight retry/backoff."""
+        """
+        Fetch VN30 closes from VPS with lightweight retry/backoff.
+
+        SESSION's adapter already retries connection failures and throttled
+        responses; this loop covers what it cannot see: read timeouts and
+        200 replies with an empty or undecodable payload.
+        """
         now = int(time.time())
         from_ts = now - days_back * 86400
-        url = f"{VPS_VN30_API_URL}&from={from_ts}&to={now}"
+        params = {**VPS_VN30_PARAMS, "from": from_ts, "to": now}
 
         last_exc: Optional[Exception] = None
         for attempt in range(retries):
             try:
-                response = requests.get(
-                    url,
-                    headers={"User-Agent": HEADERS["User-Agent"]},
+                response = SESSION.get(
+                    VPS_VN30_API_URL,
+                    params=params,
                     timeout=REQUEST_TIMEOUT
                 )
                 response.raise_for_status()
@@ -95,17 +119,10 @@ class StockRepository(Repository[Vn30Index]):
             raise last_exc
         raise ValueError("VPS API returned no VN30 data")
 
-    def _fetch_from_vietstock(self) -> Vn30Index:
+    def _fetch_from_vietstock(self, timestamp: datetime) -> Vn30Index:
         """Fetch from Vietstock."""
-        response = requests.get(
-            VIETSTOCK_URL,
-            headers=HEADERS,
-            timeout=REQUEST_TIMEOUT
-        )
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'lxml')
-        index_value, change_percent = self._extract_vn30_data(soup)
+        root = fetch_html(VIETSTOCK_URL)
+        index_value, change_percent = self._extract_vn30_data(root)
 
         if not index_value:
             raise ValueError("Failed to parse VN30 index from Vietstock")
@@ -114,10 +131,10 @@ class StockRepository(Repository[Vn30Index]):
             index_value=index_value,
             change_percent=change_percent,
             source="Vietstock",
-            timestamp=datetime.now()
+            timestamp=timestamp
         )
 
-    def _fetch_from_vps_api(self) -> Vn30Index:
+    def _fetch_from_vps_api(self, timestamp: datetime) -> Vn30Index:
         """
         Fetch VN30 index from VPS Securities TradingView-compatible API.
 
@@ -141,10 +158,10 @@ class StockRepository(Repository[Vn30Index]):
             index_value=latest_close,
             change_percent=change_percent,
             source="VPS",
-            timestamp=datetime.now()
+            timestamp=timestamp
         )
 
-    def _fetch_from_vps_last_close(self) -> Vn30Index:
+    def _fetch_from_vps_last_close(self, timestamp: datetime) -> Vn30Index:
         """Fetch latest available VN30 close from a wider VPS window."""
         closes = self._fetch_vps_closes(days_back=30)
         latest_close = closes[-1]
@@ -162,19 +179,12 @@ class StockRepository(Repository[Vn30Index]):
             index_value=latest_close,
             change_percent=change_percent,
             source="VPS (last close)",
-            timestamp=datetime.now()
+            timestamp=timestamp
         )
 
-    def _fetch_from_cafef(self) -> Vn30Index:
+    def _fetch_from_cafef(self, timestamp: datetime) -> Vn30Index:
         """Fetch from CafeF."""
-        response = requests.get(
-            CAFEF_URL,
-            headers=HEADERS,
-            timeout=REQUEST_TIMEOUT
-        )
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'lxml')
+        root = fetch_html(CAFEF_URL)
 
         # Look for the index value in typical CafeF structure
         # Usually in a div/span with class 'price', 'index', or similar
@@ -183,16 +193,16 @@ class StockRepository(Repository[Vn30Index]):
         index_value = None
         change_percent = None
 
-        text = soup.get_text()
+        text = html_text(root)
         lines = [line.strip() for line in text.split('\n') if line.strip()]
 
         for i, line in enumerate(lines):
             # CafeF usually has the index name then the value nearby
-            if 'VN30-INDEX' in line.upper():
+            if _VN30_LABEL_RE.search(line):
                 # Check next few lines for a number (skip the name line itself)
                 for j in range(i + 1, min(len(lines), i + 10)):
                     val = sanitize_vn_number(lines[j])
-                    if val and 100 < val < 10000:
+                    if val and _VN30_MIN < val < _VN30_MAX:
                         index_value = val
                         # Try to find change percent nearby
                         if j + 1 < len(lines):
@@ -210,36 +220,62 @@ class StockRepository(Repository[Vn30Index]):
             index_value=index_value,
             change_percent=change_percent,
             source="CafeF",
-            timestamp=datetime.now()
+            timestamp=timestamp
         )
 
-    def _extract_vn30_data(self, soup: BeautifulSoup) -> Tuple[Optional[Decimal], Optional[Decimal]]:
+    def _extract_vn30_data(self, root: lhtml.HtmlElement) -> Tuple[Optional[Decimal], Optional[Decimal]]:
         """
         Extract VN30 index value and percentage change from Vietstock HTML.
 
         The HTML contains text like: 'VN30-INDEX', '2,029.81', '10.83 (0.54%)'
         Line structure: line N has 'VN30-INDEX', line N+1 has value, line N+2 has change.
 
+        The label node is located with XPath and only the text that follows it
+        is read; the full-page text scan is kept as a fallback for layouts where
+        the label is not a standalone element.
+
         Returns:
             Tuple of (index_value, change_percent) or (None, None)
         """
-        text = soup.get_text()
+        for label in _VN30_LABEL_NODES(root):
+            following = [
+                line.strip()
+                for fragment in _VN30_FOLLOWING_TEXT(label)
+                for line in fragment.split('\n')
+                if line.strip()
+            ]
+            index_value, change_percent = self._parse_vn30_lines(following[:2])
+            if index_value:
+                return (index_value, change_percent)
+
+        text = html_text(root)
         lines = [line.strip() for line in text.split('\n') if line.strip()]
 
         for i, line in enumerate(lines):
             if line == 'VN30-INDEX':
-                if i + 1 < len(lines):
-                    index_value = sanitize_vn_number(lines[i + 1])
-
-                    change_percent = None
-                    if i + 2 < len(lines):
-                        change_line = lines[i + 2]
-                        if '(' in change_line and '%' in change_line:
-                            match = re.search(r'([-+]?\d+[.,]\d+)\s*\(', change_line)
-                            if match:
-                                change_percent = sanitize_vn_number(match.group(1))
-
-                    if index_value and index_value > 100 and index_value < 10000:
-                        return (index_value, change_percent)
+                index_value, change_percent = self._parse_vn30_lines(lines[i + 1:i + 3])
+                if index_value:
+                    return (index_value, change_percent)
+
+        return (None, None)
+
+    def _parse_vn30_lines(self, lines: List[str]) -> Tuple[Optional[Decimal], Optional[Decimal]]:
+        """Parse the value line and optional change line that follow the VN30-INDEX label."""
+        if not lines:
+            return (None, None)
+
+        # Vietstock always renders the index with international separators
+        index_value = sanitize_vn_number_intl(lines[0])
+
+        change_percent = None
+        if len(lines) > 1:
+            change_line = lines[1]
+            if '(' in change_line and '%' in change_line:
+                match = _PCT_RE.search(change_line)
+                if match:
+                    change_percent = sanitize_vn_number(match.group(1))
+
+        if index_value and _VN30_MIN < index_value < _VN30_MAX:
+            return (index_value, change_percent)
 
         return (None, None)
@@ -1,22 +1,53 @@
 """
 Utility functions for Vietnam Gold Dashboard.
-Includes Vietnamese number sanitization and caching decorator.
+Includes Vietnamese number sanitization, HTML parsing helpers and caching decorator.
 """
 
 import os
 import json
+import re
 import time
 from decimal import Decimal, InvalidOperation
-from functools import wraps
-from typing import Optional, Callable, Any, TypeVar
+from functools import lru_cache, wraps
+from typing import Optional, Callable, Any, Dict, Iterator, Tuple, TypeVar
 from datetime import datetime
-from dataclasses import asdict, is_dataclass
+from dataclasses import fields, is_dataclass, replace
 import requests.exceptions
-
-from .config import CACHE_DIR, CACHE_TTL_SECONDS
+from lxml import etree
+from lxml import html as lhtml
+
+from .config import CACHE_DIR, CACHE_TTL_SECONDS, REQUEST_TIMEOUT, SESSION
+from .models import (
+    BitcoinPrice,
+    GasolinePrice,
+    GoldPrice,
+    LandPrice,
+    UsdVndRate,
+    Vn30Index,
+)
 
 T = TypeVar("T")
 
+# Scraped sources are UTF-8; pinning the encoding avoids libxml2 falling back
+# to Latin-1 on pages that omit a <meta charset> (which would mangle 'bán').
+_HTML_PARSER = lhtml.HTMLParser(encoding="utf-8", remove_comments=True)
+_VISIBLE_TEXT = etree.XPath("//text()[not(ancestor::script) and not(ancestor::style)]")
+
+# Grouped numbers such as '80.000.000', '2,029.81' or '26.150,50'
+_VN_NUM_RE = re.compile(r"\d{1,3}(?:[.,]\d{3})+(?:[.,]\d{1,2})?")
+# Everything except ASCII digits and the two separators
+_NON_NUMERIC_RE = re.compile(r"[^0-9.,]")
+# Already-clean API numbers like '2600000000' or '1995.12'
+_PLAIN_NUM_RE = re.compile(r"\d+(?:\.\d+)?")
+
+# Process-local layer in front of the JSON cache files: cache_key -> (expiry, value).
+# Repeat hits within one process skip the stat, open, json.load and rebuild.
+_MEM_CACHE: Dict[str, Tuple[float, Any]] = {}
+
+# A stale value served after a failed fetch is memoized only briefly, so the
+# next refresh retries the network soon instead of waiting out a full TTL.
+_STALE_MEMO_SECONDS = 5
+
 
 def sanitize_vn_number(text: str) -> Optional[Decimal]:
     """
@@ -43,9 +74,45 @@ def sanitize_vn_number(text: str) -> Optional[Decimal]:
     if not text or not isinstance(text, str):
         return None
 
+    # Plain numbers parse the same either way; skip the separator heuristics
+    if _PLAIN_NUM_RE.fullmatch(text):
+        return Decimal(text)
+
+    return _sanitize_vn_str(text)
+
+
+def sanitize_vn_number_intl(text: str) -> Optional[Decimal]:
+    """
+    Parse a number known to use international separators ('2,029.81').
+
+    For sources whose format is fixed, so the separator detection in
+    sanitize_vn_number would only re-derive what the caller already knows:
+    commas are always thousands separators and a '.' is always decimal.
+
+    Examples:
+        >>> sanitize_vn_number_intl("2,029.81")
+        Decimal('2029.81')
+    """
+    if not text or not isinstance(text, str):
+        return None
+
+    try:
+        return Decimal(_NON_NUMERIC_RE.sub("", text).replace(",", ""))
+    except InvalidOperation:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _sanitize_vn_str(text: str) -> Optional[Decimal]:
+    """
+    Memoized core of sanitize_vn_number for non-empty strings.
+
+    Extractors call the sanitizer on every line of a page and the same short
+    tokens recur across lines and refreshes; Decimal is immutable, so sharing
+    cached results between callers is safe.
+    """
     try:
-        cleaned = text.strip()
-        cleaned = "".join(c for c in cleaned if c.isdigit() or c in ".,")
+        cleaned = _NON_NUMERIC_RE.sub("", text)
 
         if not cleaned:
             return None
@@ -53,6 +120,10 @@ def sanitize_vn_number(text: str) -> Optional[Decimal]:
         dot_count = cleaned.count(".")
         comma_count = cleaned.count(",")
 
+        # Bare digits left after stripping text (e.g. '25800 VND') are the
+        # most common shape to reach this point; skip the ladder for them
+        if not dot_count and not comma_count:
+            return Decimal(cleaned)
         if comma_count == 0 and dot_count >= 2:
             cleaned = cleaned.replace(".", "")
         elif comma_count >= 1 and dot_count == 1:
@@ -75,124 +146,224 @@ def sanitize_vn_number(text: str) -> Optional[Decimal]:
         return None
 
 
+def parse_html(content: bytes) -> lhtml.HtmlElement:
+    """
+    Parse raw HTML bytes straight into an lxml tree.
+
+    Skips the BeautifulSoup object model entirely; scrapers only need text
+    and XPath lookups, which libxml2 serves directly.
+
+    Raises:
+        ValueError: If the document is empty or cannot be parsed
+    """
+    try:
+        return lhtml.document_fromstring(content, parser=_HTML_PARSER)
+    except etree.ParserError as e:
+        raise ValueError(f"Unparseable HTML document: {e}") from e
+
+
+def fetch_html(url: str) -> lhtml.HtmlElement:
+    """
+    GET a page with the shared session and parse it as it streams in.
+
+    Decoded chunks are fed to libxml2 as they arrive, so the response is
+    never materialised as one bytes object before parsing.  Chunks come from
+    iter_content() rather than response.raw, so a timeout or reset mid-body
+    still surfaces as a requests exception for the fallback chains.
+
+    Raises:
+        requests.exceptions.RequestException: On network or HTTP errors
+        ValueError: If the document is empty or cannot be parsed
+    """
+    response = SESSION.get(url, timeout=REQUEST_TIMEOUT, stream=True)
+    try:
+        response.raise_for_status()
+        # Feed parsers hold per-document state, so each fetch gets its own
+        parser = lhtml.HTMLParser(encoding="utf-8", remove_comments=True)
+        for chunk in response.iter_content(chunk_size=16384):
+            parser.feed(chunk)
+        root = parser.close()
+    except etree.LxmlError as e:
+        raise ValueError(f"Unparseable HTML document from {url}: {e}") from e
+    finally:
+        response.close()
+
+    if root is None:
+        raise ValueError(f"Empty HTML document from {url}")
+    return root
+
+
+def html_text(root: lhtml.HtmlElement) -> str:
+    """
+    Return the visible text of a parsed document.
+
+    Mirrors BeautifulSoup's get_text(): text nodes are concatenated in
+    document order, while script and style contents are skipped.
+    """
+    return "".join(_VISIBLE_TEXT(root))
+
+
+def node_text(node: lhtml.HtmlElement) -> str:
+    """Return an element's text with each fragment stripped, like get_text(strip=True)."""
+    return "".join(part.strip() for part in node.itertext())
+
+
+def iter_prices(text: str) -> Iterator[Tuple[int, Decimal]]:
+    """
+    Yield (offset, value) for every grouped number in text, in page order.
+
+    One regex sweep over the whole text replaces splitting it into lines and
+    sanitizing each; the offset lets callers relate a value to keyword
+    positions found with str.find().
+    """
+    for match in _VN_NUM_RE.finditer(text):
+        value = sanitize_vn_number(match.group(0))
+        if value is not None:
+            yield match.start(), value
+
+
 def _get_cache_path(cache_key: str) -> str:
     """Generate cache file path for a given key."""
-    os.makedirs(CACHE_DIR, exist_ok=True)
     return os.path.join(CACHE_DIR, f"{cache_key}.json")
 
 
-def _deserialize_from_cache(obj: Any) -> Any:
-    """Reconstruct dataclass objects from cached JSON data."""
-    if isinstance(obj, dict):
-        if "__dataclass__" in obj:
-            from .models import (
-                GoldPrice,
-                UsdVndRate,
-                BitcoinPrice,
-                Vn30Index,
-                LandPrice,
-                GasolinePrice,
-            )
+# Models that cached() results may be rebuilt into, keyed by class name
+_CLASS_MAP = {
+    cls.__name__: cls
+    for cls in (GoldPrice, UsdVndRate, BitcoinPrice, Vn30Index, LandPrice, GasolinePrice)
+}
 
-            class_map = {
-                "GoldPrice": GoldPrice,
-                "UsdVndRate": UsdVndRate,
-                "BitcoinPrice": BitcoinPrice,
-                "Vn30Index": Vn30Index,
-                "LandPrice": LandPrice,
-                "GasolinePrice": GasolinePrice,
-            }
-
-            class_name = obj["__dataclass__"]
-            data_dict = obj["data"]
-
-            for key, value in data_dict.items():
-                data_dict[key] = _deserialize_from_cache(value)
-
-            if class_name in class_map:
-                return class_map[class_name](**data_dict)
-        elif "__decimal__" in obj:
-            return Decimal(obj["__decimal__"])
-        elif "__datetime__" in obj:
-            return datetime.fromisoformat(obj["__datetime__"])
-        else:
-            return {k: _deserialize_from_cache(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [_deserialize_from_cache(item) for item in obj]
+
+def _decode_cache_object(obj: dict) -> Any:
+    """
+    Rebuild one tagged JSON object from the cache format.
+
+    Used as json's object_hook, so it runs bottom-up while the file is parsed:
+    a dataclass's field values are already decoded by the time it is built.
+    """
+    if "__decimal__" in obj:
+        return Decimal(obj["__decimal__"])
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__dataclass__" in obj:
+        cls = _CLASS_MAP.get(obj["__dataclass__"])
+        if cls is not None:
+            return cls(**obj["data"])
     return obj
 
 
-def _read_cache(cache_key: str) -> Optional[dict]:
-    """Read cache data if it exists and is valid."""
-    cache_path = _get_cache_path(cache_key)
+def _deserialize_from_cache(obj: Any) -> Any:
+    """Reconstruct dataclass objects from already-parsed cache JSON data."""
+    if isinstance(obj, dict):
+        return _decode_cache_object({k: _deserialize_from_cache(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return [_deserialize_from_cache(item) for item in obj]
+    return obj
 
-    if not os.path.exists(cache_path):
-        return None
 
+def _read_cache(cache_key: str) -> Optional[Tuple[float, Any]]:
+    """Read cache data if it exists and is valid, as (expiry timestamp, data)."""
     try:
-        with open(cache_path, "r", encoding="utf-8") as f:
-            cache_data = json.load(f)
+        with open(_get_cache_path(cache_key), "r", encoding="utf-8") as f:
+            cache_data = json.load(f, object_hook=_decode_cache_object)
 
-        timestamp = cache_data.get("timestamp", 0)
-        age_seconds = time.time() - timestamp
+        expires_at = cache_data.get("timestamp", 0) + CACHE_TTL_SECONDS
 
-        if age_seconds < CACHE_TTL_SECONDS:
-            serialized_data = cache_data.get("data")
-            return _deserialize_from_cache(serialized_data)
+        if time.time() < expires_at:
+            return expires_at, cache_data.get("data")
 
         return None
     except (json.JSONDecodeError, IOError):
         return None
 
 
+# Dataclass -> its field names, introspected once per class
+_FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+
+
 def _serialize_for_cache(obj: Any) -> Any:
-    """Convert dataclass objects to JSON-serializable format."""
-    if is_dataclass(obj):
-        return {"__dataclass__": obj.__class__.__name__, "data": asdict(obj)}
-    elif isinstance(obj, Decimal):
+    """
+    Convert a result to the tagged JSON-serializable format in one pass.
+
+    Walks dataclass fields directly instead of going through asdict(), which
+    deep-copies the object only for json's default hook to walk it again.
+    """
+    if isinstance(obj, Decimal):
         return {"__decimal__": str(obj)}
-    elif isinstance(obj, datetime):
+    if isinstance(obj, datetime):
         return {"__datetime__": obj.isoformat()}
+    if isinstance(obj, dict):
+        return {k: _serialize_for_cache(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_serialize_for_cache(item) for item in obj]
+    if is_dataclass(obj) and not isinstance(obj, type):
+        cls = type(obj)
+        names = _FIELD_NAMES.get(cls)
+        if names is None:
+            names = _FIELD_NAMES[cls] = tuple(f.name for f in fields(cls))
+        return {
+            "__dataclass__": cls.__name__,
+            "data": {name: _serialize_for_cache(getattr(obj, name)) for name in names},
+        }
     return obj
 
 
 def _write_cache(cache_key: str, data: Any) -> None:
-    """Write data to cache with current timestamp."""
+    """
+    Write data to cache with current timestamp.
+
+    Written compactly to a per-process temp file and swapped in with
+    ``os.replace``, so a concurrent reader never sees a half-written entry.
+    """
     cache_path = _get_cache_path(cache_key)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
 
     try:
+        # Only writers need the directory; reads of a missing one simply miss
+        os.makedirs(CACHE_DIR, exist_ok=True)
         serialized_data = _serialize_for_cache(data)
 
         cache_data = {"timestamp": time.time(), "data": serialized_data}
 
-        with open(cache_path, "w", encoding="utf-8") as f:
+        with open(tmp_path, "w", encoding="utf-8") as f:
             json.dump(
                 cache_data,
                 f,
                 ensure_ascii=False,
-                indent=2,
-                default=_serialize_for_cache,
+                separators=(",", ":"),
             )
+        os.replace(tmp_path, cache_path)
     except IOError:
-        pass
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
 
 
 def _read_stale_cache(cache_key: str) -> Optional[dict]:
     """Read cache data regardless of TTL (for fallback purposes)."""
-    cache_path = _get_cache_path(cache_key)
-
-    if not os.path.exists(cache_path):
-        return None
-
     try:
-        with open(cache_path, "r", encoding="utf-8") as f:
-            cache_data = json.load(f)
-        serialized_data = cache_data.get("data")
-        return _deserialize_from_cache(serialized_data)
+        with open(_get_cache_path(cache_key), "r", encoding="utf-8") as f:
+            cache_data = json.load(f, object_hook=_decode_cache_object)
+        return cache_data.get("data")
     except (json.JSONDecodeError, IOError):
         return None
 
 
+def _memo_copy(value: Any) -> Any:
+    """
+    Return a per-caller copy of a memoized result.
+
+    The models are plain mutable dataclasses, so handing every caller the
+    memo's own instance would let one caller's edit leak into later hits.
+    Model fields are immutable values (Decimal, datetime, str), so a shallow
+    copy is enough.
+    """
+    if is_dataclass(value) and not isinstance(value, type):
+        return replace(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
 def cached(func: Callable[..., T]) -> Callable[..., T]:
     """
     Decorator that caches function results with TTL-based expiration.
@@ -203,6 +374,13 @@ def cached(func: Callable[..., T]) -> Callable[..., T]:
     - If function raises requests.exceptions.RequestException, returns stale cache
     - Caches successful results with timestamp
 
+    Entries are JSON files under CACHE_DIR keyed by class and method name, so
+    they survive process restarts: a dashboard restarted within the TTL serves
+    every source from disk without touching the network.  Within one process
+    the decoded value is also kept in memory until the same expiry, so only
+    the first hit per key pays for reading and rebuilding the file; every
+    caller still gets its own copy of the result.
+
     Args:
         func: Function to decorate (should return dataclass model or dict)
 
@@ -217,18 +395,26 @@ def cached(func: Callable[..., T]) -> Callable[..., T]:
         else:
             cache_key = f"{func.__name__}"
 
-        cached_data = _read_cache(cache_key)
-        if cached_data is not None:
-            return cached_data
+        now = time.time()
+        memo = _MEM_CACHE.get(cache_key)
+        if memo is not None and memo[0] > now:
+            return _memo_copy(memo[1])
+
+        cached_entry = _read_cache(cache_key)
+        if cached_entry is not None:
+            _MEM_CACHE[cache_key] = cached_entry
+            return _memo_copy(cached_entry[1])
 
         try:
             result = func(*args, **kwargs)
             _write_cache(cache_key, result)
-            return result
+            _MEM_CACHE[cache_key] = (time.time() + CACHE_TTL_SECONDS, result)
+            return _memo_copy(result)
         except requests.exceptions.RequestException:
             stale_data = _read_stale_cache(cache_key)
             if stale_data is not None:
-                return stale_data
+                _MEM_CACHE[cache_key] = (now + _STALE_MEMO_SECONDS, stale_data)
+                return _memo_copy(stale_data)
             raise
 
     return wrapper
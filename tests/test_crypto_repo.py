@@ -0,0 +1,83 @@
+"""Regression tests for CryptoRepository source parsing."""
+
+import json
+import unittest
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from gold_dashboard.repositories.crypto_repo import CryptoRepository
+
+
+def _cmc_page(next_data: dict, body: str = "") -> bytes:
+    """Build a minimal CoinMarketCap-like page with an embedded __NEXT_DATA__ script."""
+    return (
+        "<html><head>"
+        '<script id="__NEXT_DATA__" type="application/json">'
+        f"{json.dumps(next_data)}</script>"
+        f"</head><body>{body}</body></html>"
+    ).encode("utf-8")
+
+
+class TestCoinMarketCapParsing(unittest.TestCase):
+    """Ensure the embedded JSON payload is preferred over DOM heuristics."""
+
+    def test_reads_rate_from_next_data(self) -> None:
+        """A price field in the BTC/VND range should be returned without DOM parsing."""
+        content = _cmc_page(
+            {"props": {"pageProps": {"quote": {"usdPrice": 97000.5, "price": 2612345678.9}}}}
+        )
+
+        rate = CryptoRepository()._extract_next_data_rate(content)
+
+        self.assertEqual(rate, Decimal("2612345678.9"))
+
+    def test_ignores_competing_price_keys(self) -> None:
+        """24h high/low and all-time-high figures must not displace the spot price."""
+        content = _cmc_page(
+            {
+                "props": {
+                    "pageProps": {
+                        "stats": {"athPrice": 3100000000, "lowPrice24h": 2500000000},
+                        "quote": {
+                            "highPrice24h": 2700000000,
+                            "price": 2612345678.9,
+                            "lowPrice24h": 2550000000,
+                        },
+                    }
+                }
+            }
+        )
+
+        rate = CryptoRepository()._extract_next_data_rate(content)
+
+        self.assertEqual(rate, Decimal("2612345678.9"))
+
+    def test_ignores_price_outside_quote(self) -> None:
+        """A bare in-range 'price' field that is not a quote should be skipped."""
+        content = _cmc_page({"props": {"pageProps": {"price": 3100000000}}})
+
+        self.assertIsNone(CryptoRepository()._extract_next_data_rate(content))
+
+    def test_ignores_out_of_range_prices(self) -> None:
+        """USD-denominated price fields must not be mistaken for the VND rate."""
+        content = _cmc_page({"props": {"pageProps": {"price": 97000.5}}})
+
+        self.assertIsNone(CryptoRepository()._extract_next_data_rate(content))
+
+    @patch("gold_dashboard.repositories.crypto_repo.SESSION.get")
+    def test_fetch_falls_back_to_dom_without_next_data(self, mock_get: MagicMock) -> None:
+        """Pages without the script tag should still parse via the DOM heuristics."""
+        response = MagicMock()
+        response.raise_for_status = MagicMock()
+        response.content = b'<html><body><span class="price">2.612.345.678</span></body></html>'
+        mock_get.return_value = response
+
+        repo = CryptoRepository()
+        result = CryptoRepository.fetch.__wrapped__(repo)
+
+        self.assertEqual(result.source, "CoinMarketCap")
+        self.assertEqual(result.btc_to_vnd, Decimal("2612345678"))
+
+
+if __name__ == "__main__":
+    unittest.main()
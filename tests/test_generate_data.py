@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from decimal import Decimal
 
 from gold_dashboard.generate_data import (
+    fetch_all_data,
     serialize_data,
     merge_current_into_timeseries,
     _assess_payload_health,
@@ -305,7 +306,7 @@ class TestPayloadHealthAndLkg(unittest.TestCase):
         self.assertEqual(restored, [])
         self.assertEqual(payload["gasoline"]["source"], "Fallback (Manual estimate)")
 
-    @patch("gold_dashboard.generate_data.record_snapshot")
+    @patch("gold_dashboard.generate_data.record_snapshots")
     def test_record_current_snapshots_skips_seed_gasoline(self, mock_record) -> None:
         data = DashboardData(
             gasoline=GasolinePrice(
@@ -321,5 +322,32 @@ class TestPayloadHealthAndLkg(unittest.TestCase):
         mock_record.assert_not_called()
 
 
+
+class TestFetchAllData(unittest.TestCase):
+    """Ensure one broken source never aborts the whole fetch."""
+
+    def test_failing_constructor_falls_through_to_fail_label(self) -> None:
+        class _BrokenRepository:
+            def __init__(self) -> None:
+                raise RuntimeError("bad config")
+
+        class _WorkingRepository:
+            def fetch(self) -> Vn30Index:
+                return Vn30Index(index_value=Decimal("1300"), source="Test")
+
+        sources = (
+            ("gold", _BrokenRepository, "Gold price", "Gold"),
+            ("vn30", _WorkingRepository, "VN30 index", "VN30"),
+        )
+        with patch("gold_dashboard.generate_data._FETCH_SOURCES", sources), \
+                patch("builtins.print") as mock_print:
+            data = fetch_all_data()
+
+        self.assertIsNone(data.gold)
+        self.assertEqual(data.vn30.index_value, Decimal("1300"))
+        printed = [call.args[0] for call in mock_print.call_args_list]
+        self.assertIn("⚠ Gold fetch failed: bad config", printed)
+
+
 if __name__ == "__main__":
     unittest.main()
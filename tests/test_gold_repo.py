@@ -0,0 +1,140 @@
+"""Regression tests for GoldRepository source parsing."""
+
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from gold_dashboard.config import SOURCE_FAIL_TTL_SECONDS
+from gold_dashboard.repositories import gold_repo
+from gold_dashboard.repositories.gold_repo import GoldRepository
+
+
+def _streamed_response(html: str, chunk_size: int = 16384) -> MagicMock:
+    """Build a mocked streaming response that yields the page in chunks."""
+    body = html.encode("utf-8")
+    response = MagicMock()
+    response.raise_for_status = MagicMock()
+    response.iter_content.return_value = [
+        body[i:i + chunk_size] for i in range(0, len(body), chunk_size)
+    ]
+    return response
+
+
+class TestMihongParsing(unittest.TestCase):
+    """Ensure the streamed Mi Hồng parser finds the SJC row and stops early."""
+
+    @patch("gold_dashboard.repositories.gold_repo.SESSION.get")
+    def test_stops_reading_once_sjc_row_is_parsed(self, mock_get: MagicMock) -> None:
+        """Chunks after the SJC row should never be pulled from the socket."""
+        html = (
+            "<html><body><table>"
+            "<tr><th>Loại</th><th>Mua</th><th>Bán</th></tr>"
+            "<tr><td>SJC</td><td>80.000.000</td><td>82.000.000</td></tr>"
+            "</table>" + "<p>padding</p>" * 5000 + "</body></html>"
+        )
+        response = _streamed_response(html)
+        chunks = response.iter_content.return_value
+        consumed = []
+        response.iter_content.return_value = (consumed.append(c) or c for c in chunks)
+        mock_get.return_value = response
+
+        result = GoldRepository()._fetch_from_mihong(datetime.now())
+
+        self.assertEqual(result.buy_price, Decimal("80000000"))
+        self.assertEqual(result.sell_price, Decimal("82000000"))
+        self.assertEqual(len(consumed), 1)
+        response.close.assert_called_once()
+
+    @patch("gold_dashboard.repositories.gold_repo.SESSION.get")
+    def test_falls_back_to_text_scan_without_table(self, mock_get: MagicMock) -> None:
+        """Pages without an SJC table row should still parse via the text scan."""
+        mock_get.return_value = _streamed_response(
+            "<html><body><div>\nSJC\nMua\n80.000.000\nBán\n82.000.000\n</div></body></html>"
+        )
+
+        result = GoldRepository()._fetch_from_mihong(datetime.now())
+
+        self.assertEqual(result.buy_price, Decimal("80000000"))
+        self.assertEqual(result.sell_price, Decimal("82000000"))
+
+    @patch("gold_dashboard.repositories.gold_repo.SESSION.get")
+    def test_empty_page_raises_value_error(self, mock_get: MagicMock) -> None:
+        """An empty body must surface as ValueError so the fallback chain continues."""
+        mock_get.return_value = _streamed_response("")
+
+        with self.assertRaises(ValueError):
+            GoldRepository()._fetch_from_mihong(datetime.now())
+
+
+class TestDeadSourceSkipping(unittest.TestCase):
+    """Ensure a failed source is not retried until its negative TTL lapses."""
+
+    def setUp(self) -> None:
+        gold_repo._dead_until.clear()
+        self.addCleanup(gold_repo._dead_until.clear)
+
+    @patch.object(GoldRepository, "_fetch_from_sjc")
+    @patch.object(GoldRepository, "_fetch_from_mihong")
+    @patch.object(GoldRepository, "_fetch_from_doji")
+    def test_failed_source_is_skipped_on_next_fetch(
+        self,
+        mock_doji: MagicMock,
+        mock_mihong: MagicMock,
+        mock_sjc: MagicMock,
+    ) -> None:
+        """A DOJI timeout should send the next refresh straight to Mi Hồng."""
+        mock_doji.side_effect = requests.exceptions.Timeout("doji down")
+        mock_mihong.return_value = "mihong-price"
+
+        repo = GoldRepository()
+        self.assertEqual(GoldRepository.fetch.__wrapped__(repo), "mihong-price")
+        self.assertEqual(GoldRepository.fetch.__wrapped__(repo), "mihong-price")
+
+        self.assertEqual(mock_doji.call_count, 1)
+        self.assertEqual(mock_mihong.call_count, 2)
+        mock_sjc.assert_not_called()
+
+    @patch("gold_dashboard.repositories.gold_repo.time.monotonic")
+    @patch.object(GoldRepository, "_fetch_from_mihong")
+    @patch.object(GoldRepository, "_fetch_from_doji")
+    def test_source_is_retried_after_ttl(
+        self,
+        mock_doji: MagicMock,
+        mock_mihong: MagicMock,
+        mock_monotonic: MagicMock,
+    ) -> None:
+        """Once the deadline passes, the source should be attempted again."""
+        mock_doji.side_effect = [requests.exceptions.Timeout("doji down"), "doji-price"]
+        mock_mihong.return_value = "mihong-price"
+        repo = GoldRepository()
+
+        mock_monotonic.return_value = 1000.0
+        self.assertEqual(GoldRepository.fetch.__wrapped__(repo), "mihong-price")
+
+        mock_monotonic.return_value = 1000.0 + SOURCE_FAIL_TTL_SECONDS - 1
+        self.assertEqual(GoldRepository.fetch.__wrapped__(repo), "mihong-price")
+        self.assertEqual(mock_doji.call_count, 1)
+
+        mock_monotonic.return_value = 1000.0 + SOURCE_FAIL_TTL_SECONDS + 1
+        self.assertEqual(GoldRepository.fetch.__wrapped__(repo), "doji-price")
+        self.assertEqual(mock_doji.call_count, 2)
+
+    @patch.object(GoldRepository, "_fetch_from_mihong")
+    @patch.object(GoldRepository, "_fetch_from_doji")
+    def test_parse_error_does_not_mark_source_dead(
+        self, mock_doji: MagicMock, mock_mihong: MagicMock
+    ) -> None:
+        """A one-off bad page should not pin the source as dead."""
+        mock_doji.side_effect = [ValueError("No DGPlist found"), "doji-price"]
+        mock_mihong.return_value = "mihong-price"
+
+        repo = GoldRepository()
+        self.assertEqual(GoldRepository.fetch.__wrapped__(repo), "mihong-price")
+        self.assertEqual(GoldRepository.fetch.__wrapped__(repo), "doji-price")
+        self.assertNotIn("doji", gold_repo._dead_until)
+
+if __name__ == "__main__":
+    unittest.main()
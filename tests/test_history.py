@@ -5,6 +5,7 @@ Uses unittest with mocking to avoid real network calls.
 
 import json
 import os
+import shutil
 import tempfile
 import unittest
 from datetime import datetime, timedelta
@@ -14,6 +15,7 @@ from unittest.mock import patch, MagicMock
 from gold_dashboard.config import HISTORY_PERIODS
 from gold_dashboard.history_store import (
     record_snapshot,
+    record_snapshots,
     get_value_at,
     get_all_entries,
     _load_history,
@@ -31,6 +33,7 @@ from gold_dashboard.models import (
     UsdVndRate,
     Vn30Index,
 )
+from gold_dashboard.repositories import history_repo
 from gold_dashboard.repositories.history_repo import (
     HistoryRepository,
     _compute_change_percent,
@@ -104,6 +107,14 @@ class TestHistoryStore(unittest.TestCase):
         entries = get_all_entries("gold")
         self.assertEqual(len(entries), 3)
 
+    def test_out_of_order_records_stay_sorted(self) -> None:
+        """Backfilled days should be inserted in date order."""
+        for day in (10, 2, 7, 1):
+            record_snapshot("gold", Decimal(str(day)), datetime(2025, 6, day))
+
+        dates = [e["date"] for e in get_all_entries("gold")]
+        self.assertEqual(dates, ["2025-06-01", "2025-06-02", "2025-06-07", "2025-06-10"])
+
     def test_get_value_at_closest(self) -> None:
         """Should return the closest snapshot within tolerance."""
         record_snapshot("gold", Decimal("100"), datetime(2025, 6, 1))
@@ -113,6 +124,16 @@ class TestHistoryStore(unittest.TestCase):
         value = get_value_at("gold", datetime(2025, 6, 2))
         self.assertEqual(value, Decimal("100"))
 
+    def test_get_value_at_picks_nearest_neighbour(self) -> None:
+        """Lookups between snapshots should pick the nearer side, earlier on ties."""
+        for day in (1, 5, 9, 20):
+            record_snapshot("gold", Decimal(str(day)), datetime(2025, 6, day))
+
+        self.assertEqual(get_value_at("gold", datetime(2025, 6, 8)), Decimal("9"))
+        self.assertEqual(get_value_at("gold", datetime(2025, 6, 3)), Decimal("1"))
+        self.assertEqual(get_value_at("gold", datetime(2025, 6, 22)), Decimal("20"))
+        self.assertIsNone(get_value_at("gold", datetime(2025, 6, 14)))
+
     def test_get_value_at_too_far(self) -> None:
         """Should return None if closest snapshot is beyond tolerance."""
         record_snapshot("gold", Decimal("100"), datetime(2025, 1, 1))
@@ -143,10 +164,110 @@ class TestHistoryStore(unittest.TestCase):
         self.assertEqual(get_value_at("gold", ts), Decimal("100"))
         self.assertEqual(get_value_at("bitcoin", ts), Decimal("999"))
 
+    def test_record_snapshots_writes_batch_once(self) -> None:
+        """A batch across assets should be deduplicated per day and saved once."""
+        ts = datetime(2025, 6, 1, 9, 0, 0)
+        with patch(
+            "gold_dashboard.history_store._save_history",
+            wraps=_save_history,
+        ) as mock_save:
+            record_snapshots([
+                ("gold", Decimal("100"), ts),
+                ("bitcoin", Decimal("999"), ts),
+                ("gold", Decimal("150"), ts + timedelta(hours=1)),
+            ])
+            record_snapshots([])
+
+        mock_save.assert_called_once()
+        self.assertEqual([e["value"] for e in get_all_entries("gold")], ["150"])
+        self.assertEqual(get_value_at("bitcoin", ts), Decimal("999"))
+
+    def test_unchanged_value_skips_rewrite(self) -> None:
+        """Re-recording the day's current value should not touch the file."""
+        record_snapshot("gold", Decimal("100"), datetime(2025, 6, 1, 9, 0, 0))
+
+        with patch("gold_dashboard.history_store._save_history") as mock_save:
+            record_snapshot("gold", Decimal("100"), datetime(2025, 6, 1, 9, 10, 0))
+            mock_save.assert_not_called()
+
+        self.assertEqual(get_all_entries("gold")[0]["timestamp"], "2025-06-01T09:00:00")
+
+    def test_save_history_replaces_file_atomically(self) -> None:
+        """Saves should leave compact JSON in place and no temp file behind."""
+        record_snapshot("gold", Decimal("100"), datetime(2025, 6, 1))
+
+        with open(self._tmp.name, encoding="utf-8") as f:
+            raw = f.read()
+        self.assertNotIn("\n", raw)
+        self.assertEqual(json.loads(raw)["gold"][0]["value"], "100")
+        self.assertFalse(os.path.exists(self._tmp.name + ".tmp"))
+
+    def test_history_is_capped_to_rolling_window(self) -> None:
+        """Snapshots older than MAX_HISTORY_DAYS behind the newest are dropped or ignored."""
+        record_snapshot("gold", Decimal("100"), datetime(2020, 1, 1))
+        record_snapshot("gold", Decimal("200"), datetime(2024, 1, 1))
+        record_snapshot("gold", Decimal("300"), datetime(2025, 6, 1))
+
+        self.assertEqual(
+            [e["date"] for e in get_all_entries("gold")],
+            ["2024-01-01", "2025-06-01"],
+        )
+
+        with patch("gold_dashboard.history_store._save_history") as mock_save:
+            record_snapshot("gold", Decimal("50"), datetime(2019, 1, 1))
+            mock_save.assert_not_called()
+
+    def test_load_history_parses_file_once_until_it_changes(self) -> None:
+        """Repeated reads should reuse the parsed dict until the file is rewritten."""
+        record_snapshot("gold", Decimal("100"), datetime(2025, 6, 1))
+
+        with patch("gold_dashboard.history_store.json.load", wraps=json.load) as mock_load:
+            get_value_at("gold", datetime(2025, 6, 1))
+            get_all_entries("gold")
+            mock_load.assert_not_called()
+
+            with open(self._tmp.name, "w", encoding="utf-8") as f:
+                json.dump({"gold": [{"date": "2025-06-01", "value": "12345", "timestamp": ""}]}, f)
+            self.assertEqual(get_value_at("gold", datetime(2025, 6, 1)), Decimal("12345"))
+            self.assertEqual(mock_load.call_count, 1)
+
 
 class TestHistoryRepository(unittest.TestCase):
     """Test HistoryRepository with mocked external API calls."""
 
+    @classmethod
+    def setUpClass(cls) -> None:
+        # HistoryRepository keeps no per-instance state, and the ~3Y fake API
+        # series are only read, so both are built once for the whole class.
+        cls.repo = HistoryRepository()
+
+        now = datetime.now()
+        cls._coingecko_prices = [
+            [(now - timedelta(days=days_ago)).timestamp() * 1000, 2000000000 + days_ago * 1000000]
+            for days_ago in reversed(range(1096))
+        ]
+
+        now_ts = int(now.timestamp())
+        cls._vps_timestamps = [now_ts - i * 86400 for i in reversed(range(1096))]
+        cls._vps_closes = [1200 + i * 0.1 for i in range(1096)]
+
+    def setUp(self) -> None:
+        tmp = tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False)
+        tmp.close()
+        self.addCleanup(os.unlink, tmp.name)
+        patcher = patch("gold_dashboard.history_store.HISTORY_FILE", tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Runs first: background gold backfills must land in the temp file
+        self.addCleanup(history_repo._flush_backfills)
+        changes_cache = os.path.join(tempfile.mkdtemp(), "history_changes.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(changes_cache))
+        cache_patcher = patch.object(history_repo, "_CHANGES_CACHE_FILE", changes_cache)
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+        history_repo._TTL_CACHE.clear()
+        self.addCleanup(history_repo._TTL_CACHE.clear)
+
     def _make_dashboard_data(self) -> DashboardData:
         return DashboardData(
             gold=GoldPrice(
@@ -164,16 +285,15 @@ class TestHistoryRepository(unittest.TestCase):
             ),
         )
 
-    @patch("gold_dashboard.repositories.history_repo.record_snapshot")
+    @patch("gold_dashboard.repositories.history_repo.record_snapshots", MagicMock())
     @patch("gold_dashboard.repositories.history_repo.get_value_at")
-    @patch("gold_dashboard.repositories.history_repo.requests.post")
-    @patch("gold_dashboard.repositories.history_repo.requests.get")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.post")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
     def test_fetch_changes_returns_all_assets(
         self,
         mock_get: MagicMock,
         mock_post: MagicMock,
         mock_local: MagicMock,
-        mock_record: MagicMock,
     ) -> None:
         """fetch_changes should return a dict with all required asset keys."""
         # Make all external calls fail so we fall through to local store
@@ -183,9 +303,8 @@ class TestHistoryRepository(unittest.TestCase):
         mock_post.side_effect = requests.exceptions.ConnectionError("network down")
         mock_local.return_value = None
 
-        repo = HistoryRepository()
         data = self._make_dashboard_data()
-        result = repo.fetch_changes(data)
+        result = self.repo.fetch_changes(data)
 
         self.assertIn("gold", result)
         self.assertIn("usd_vnd", result)
@@ -201,9 +320,93 @@ class TestHistoryRepository(unittest.TestCase):
                 list(HISTORY_PERIODS.keys()),
             )
 
-    @patch("gold_dashboard.repositories.history_repo.record_snapshot")
+    @patch("gold_dashboard.repositories.history_repo.record_snapshots")
     @patch("gold_dashboard.repositories.history_repo.get_value_at")
-    @patch("gold_dashboard.repositories.history_repo.requests.get")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.post")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
+    def test_fetch_changes_reuses_reference_values_within_the_day(
+        self,
+        mock_get: MagicMock,
+        mock_post: MagicMock,
+        mock_local: MagicMock,
+        mock_record: MagicMock,
+    ) -> None:
+        """Fully resolved assets skip the APIs on the next call but keep seeding."""
+        import requests.exceptions
+
+        mock_get.side_effect = requests.exceptions.ConnectionError("network down")
+        mock_post.side_effect = requests.exceptions.ConnectionError("network down")
+        mock_local.return_value = Decimal("25000")
+
+        data = self._make_dashboard_data()
+        self.repo.fetch_changes(data)
+        api_calls = mock_get.call_count + mock_post.call_count
+        history_repo._TTL_CACHE.clear()
+        mock_record.reset_mock()
+
+        data.usd_vnd = UsdVndRate(sell_rate=Decimal("26000"), source="Test")
+        result = self.repo.fetch_changes(data)
+
+        self.assertEqual(mock_get.call_count + mock_post.call_count, api_calls)
+        self.assertEqual(list(result), ["gold", "usd_vnd", "bitcoin", "vn30", "land"])
+        usd_1d = result["usd_vnd"].changes[0]
+        self.assertEqual(usd_1d.old_value, Decimal("25000"))
+        self.assertEqual(usd_1d.new_value, Decimal("26000"))
+        self.assertEqual(usd_1d.change_percent, Decimal("4.00"))
+        # History seeds are still planted for cached assets
+        self.assertEqual(mock_record.call_count, 5)
+        self.assertEqual(
+            os.listdir(os.path.dirname(history_repo._CHANGES_CACHE_FILE)),
+            ["history_changes.json"],
+        )
+
+    @patch("gold_dashboard.repositories.history_repo.record_snapshots", MagicMock())
+    @patch("gold_dashboard.repositories.history_repo.get_value_at")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.post")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
+    def test_fetch_changes_does_not_cache_assets_with_gaps(
+        self,
+        mock_get: MagicMock,
+        mock_post: MagicMock,
+        mock_local: MagicMock,
+    ) -> None:
+        """An asset with an unresolved period is fetched live again next time."""
+        import requests.exceptions
+
+        mock_get.side_effect = requests.exceptions.ConnectionError("network down")
+        mock_post.side_effect = requests.exceptions.ConnectionError("network down")
+        mock_local.return_value = None
+
+        data = DashboardData(vn30=Vn30Index(index_value=Decimal("1300"), source="Test"))
+        self.repo.fetch_changes(data)
+        first_calls = mock_get.call_count
+        self.assertGreater(first_calls, 0)
+        history_repo._TTL_CACHE.clear()
+        self.repo.fetch_changes(data)
+
+        self.assertEqual(mock_get.call_count, 2 * first_calls)
+        self.assertEqual(history_repo._load_reference_values(), {})
+
+    @patch("gold_dashboard.repositories.history_repo.SESSION.post")
+    def test_chogia_history_is_cached_within_ttl(self, mock_post: MagicMock) -> None:
+        """A second chogia.vn fetch inside the TTL should not hit the network."""
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = {
+            "success": True,
+            "data": [{"ngay": "2025-06-01", "gia_ban": "25800"}],
+        }
+        mock_post.return_value = mock_resp
+
+        first = HistoryRepository()._fetch_chogia_history()
+        first["2025-06-02"] = Decimal("1")
+        second = HistoryRepository()._fetch_chogia_history()
+
+        mock_post.assert_called_once()
+        self.assertEqual(second, {"2025-06-01": Decimal("25800")})
+
+    @patch("gold_dashboard.repositories.history_repo.record_snapshots")
+    @patch("gold_dashboard.repositories.history_repo.get_value_at")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
     def test_gold_webgia_success(
         self, mock_get: MagicMock, mock_local: MagicMock, mock_record: MagicMock
     ) -> None:
@@ -233,8 +436,8 @@ class TestHistoryRepository(unittest.TestCase):
         mock_get.return_value = mock_response
         mock_local.return_value = None
 
-        repo = HistoryRepository()
-        result = repo._gold_changes(Decimal("181000000"))
+        result = self.repo._gold_changes(Decimal("181000000"))
+        history_repo._flush_backfills()
 
         self.assertEqual(result.asset_name, "gold")
         self.assertEqual(len(result.changes), len(HISTORY_PERIODS))
@@ -247,19 +450,19 @@ class TestHistoryRepository(unittest.TestCase):
             change_map["1Y"].change_percent, "1Y should have data from webgia"
         )
         # 3Y exceeds webgia range; depends on local store seeds
-        # Backfill should have been called
-        self.assertTrue(mock_record.called)
+        # Seeds and the webgia backfill should each be recorded as one batch
+        self.assertEqual(mock_record.call_count, 2)
+        self.assertEqual(len(mock_record.call_args_list[1].args[0]), len(data_points))
 
-    @patch("gold_dashboard.repositories.history_repo.record_snapshot")
+    @patch("gold_dashboard.repositories.history_repo.record_snapshots", MagicMock())
     @patch("gold_dashboard.repositories.history_repo.get_value_at")
-    @patch("gold_dashboard.repositories.history_repo.requests.post")
-    @patch("gold_dashboard.repositories.history_repo.requests.get")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.post")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
     def test_gold_falls_back_to_chogia(
         self,
         mock_get: MagicMock,
         mock_post: MagicMock,
         mock_local: MagicMock,
-        mock_record: MagicMock,
     ) -> None:
         """When webgia.com fails, gold should fall back to chogia.vn for 1W/1M."""
         import requests.exceptions
@@ -286,24 +489,35 @@ class TestHistoryRepository(unittest.TestCase):
         mock_post.return_value = mock_post_response
         mock_local.return_value = None
 
-        repo = HistoryRepository()
-        result = repo._gold_changes(Decimal("181000000"))
+        result = self.repo._gold_changes(Decimal("181000000"))
+        history_repo._flush_backfills()
 
         self.assertEqual(result.asset_name, "gold")
         change_map = {c.period: c for c in result.changes}
         self.assertIsNotNone(change_map["1W"].change_percent, "1W from chogia fallback")
         self.assertIsNotNone(change_map["1M"].change_percent, "1M from chogia fallback")
 
-    @patch("gold_dashboard.repositories.history_repo.record_snapshot")
+    @patch("builtins.print")
+    def test_failed_background_backfill_is_logged(self, mock_print: MagicMock) -> None:
+        """An exception raised on the backfill worker should be reported, not lost."""
+        failing = MagicMock(side_effect=OSError("disk full"))
+
+        history_repo._submit_backfill(failing, {"2025-06-01": Decimal("1")})
+        self.repo.flush_backfills()
+
+        failing.assert_called_once()
+        mock_print.assert_called_once()
+        self.assertIn("disk full", mock_print.call_args.args[0])
+
+    @patch("gold_dashboard.repositories.history_repo.record_snapshots", MagicMock())
     @patch("gold_dashboard.repositories.history_repo.get_value_at")
-    @patch("gold_dashboard.repositories.history_repo.requests.post")
-    @patch("gold_dashboard.repositories.history_repo.requests.get")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.post")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
     def test_gold_falls_back_to_local_store(
         self,
         mock_get: MagicMock,
         mock_post: MagicMock,
         mock_local: MagicMock,
-        mock_record: MagicMock,
     ) -> None:
         """When both webgia and chogia fail, gold uses local history store."""
         import requests.exceptions
@@ -312,8 +526,7 @@ class TestHistoryRepository(unittest.TestCase):
         mock_post.side_effect = requests.exceptions.ConnectionError("down")
         mock_local.return_value = Decimal("170000000")
 
-        repo = HistoryRepository()
-        result = repo._gold_changes(Decimal("181000000"))
+        result = self.repo._gold_changes(Decimal("181000000"))
 
         self.assertEqual(result.asset_name, "gold")
         self.assertEqual(len(result.changes), len(HISTORY_PERIODS))
@@ -324,8 +537,8 @@ class TestHistoryRepository(unittest.TestCase):
             self.assertIsNotNone(change.old_value)
 
     @patch("gold_dashboard.repositories.history_repo.get_value_at")
-    @patch("gold_dashboard.repositories.history_repo.requests.post")
-    @patch("gold_dashboard.repositories.history_repo.requests.get")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.post")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
     def test_gold_3y_uses_seed_nearest_when_local_misses(
         self,
         mock_get: MagicMock,
@@ -339,12 +552,11 @@ class TestHistoryRepository(unittest.TestCase):
         mock_post.side_effect = requests.exceptions.ConnectionError("down")
         mock_local.return_value = None
 
-        repo = HistoryRepository()
         with patch(
             "gold_dashboard.repositories.history_repo.datetime", wraps=datetime
         ) as mock_dt:
             mock_dt.now.return_value = datetime(2026, 2, 16, 12, 0, 0)
-            result = repo._gold_changes(Decimal("179000000"))
+            result = self.repo._gold_changes(Decimal("179000000"))
 
         change_map = {c.period: c for c in result.changes}
         self.assertIsNotNone(change_map["3Y"].old_value)
@@ -352,27 +564,18 @@ class TestHistoryRepository(unittest.TestCase):
         self.assertIsNotNone(change_map["3Y"].change_percent)
 
     @patch("gold_dashboard.repositories.history_repo.get_value_at")
-    @patch("gold_dashboard.repositories.history_repo.requests.get")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
     def test_bitcoin_coingecko_success(
         self, mock_get: MagicMock, mock_local: MagicMock
     ) -> None:
         """When CoinGecko returns data, Bitcoin changes should be computed from it."""
-        now = datetime.now()
-        # Build fake CoinGecko response with daily prices
-        prices = []
-        for days_ago in range(1096):
-            ts_ms = (now - timedelta(days=days_ago)).timestamp() * 1000
-            prices.append([ts_ms, 2000000000 + days_ago * 1000000])
-        prices.reverse()
-
         mock_response = MagicMock()
         mock_response.raise_for_status = MagicMock()
-        mock_response.json.return_value = {"prices": prices}
+        mock_response.json.return_value = {"prices": self._coingecko_prices}
         mock_get.return_value = mock_response
         mock_local.return_value = None
 
-        repo = HistoryRepository()
-        result = repo._bitcoin_changes(Decimal("2600000000"))
+        result = self.repo._bitcoin_changes(Decimal("2600000000"))
 
         self.assertEqual(result.asset_name, "bitcoin")
         # At least some periods should have computed values
@@ -380,35 +583,45 @@ class TestHistoryRepository(unittest.TestCase):
         self.assertTrue(has_data)
 
     @patch("gold_dashboard.repositories.history_repo.get_value_at")
-    @patch("gold_dashboard.repositories.history_repo.requests.get")
-    def test_vn30_vps_success(self, mock_get: MagicMock, mock_local: MagicMock) -> None:
-        """When VPS API returns data, VN30 changes should be computed."""
-        import time as _time
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
+    def test_bitcoin_skips_coingecko_when_all_periods_exceed_cap(
+        self, mock_get: MagicMock, mock_local: MagicMock
+    ) -> None:
+        """Periods beyond the CoinGecko free-tier window should not trigger a request."""
+        mock_local.return_value = None
+        targets = [("3Y", 1095, datetime.now() - timedelta(days=1095))]
+
+        result = self.repo._bitcoin_changes(Decimal("2600000000"), targets)
 
-        now_ts = int(_time.time())
-        timestamps = [now_ts - i * 86400 for i in range(1096)]
-        timestamps.reverse()
-        closes = [1200 + i * 0.1 for i in range(1096)]
+        mock_get.assert_not_called()
+        self.assertEqual([c.period for c in result.changes], ["3Y"])
 
+    @patch("gold_dashboard.repositories.history_repo.get_value_at")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
+    def test_vn30_vps_success(self, mock_get: MagicMock, mock_local: MagicMock) -> None:
+        """When VPS API returns data, VN30 changes should be computed."""
         mock_response = MagicMock()
         mock_response.raise_for_status = MagicMock()
         mock_response.json.return_value = {
             "s": "ok",
-            "t": timestamps,
-            "c": closes,
+            "t": self._vps_timestamps,
+            "c": self._vps_closes,
         }
         mock_get.return_value = mock_response
         mock_local.return_value = None
 
-        repo = HistoryRepository()
-        result = repo._vn30_changes(Decimal("1300"))
+        result = self.repo._vn30_changes(Decimal("1300"))
 
         self.assertEqual(result.asset_name, "vn30")
         has_data = any(c.change_percent is not None for c in result.changes)
         self.assertTrue(has_data)
 
+        params = mock_get.call_args.kwargs["params"]
+        self.assertEqual((params["symbol"], params["resolution"]), ("VN30", "D"))
+        self.assertEqual(params["to"] - params["from"], max(HISTORY_PERIODS.values()) * 86400)
+
     @patch("gold_dashboard.repositories.history_repo.get_value_at")
-    @patch("gold_dashboard.repositories.history_repo.requests.get")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
     def test_vn30_short_periods_do_not_use_seed_fallback(
         self, mock_get: MagicMock, mock_local: MagicMock
     ) -> None:
@@ -418,12 +631,11 @@ class TestHistoryRepository(unittest.TestCase):
         mock_get.side_effect = requests.exceptions.ConnectionError("down")
         mock_local.return_value = None
 
-        repo = HistoryRepository()
         with patch(
             "gold_dashboard.repositories.history_repo.datetime", wraps=datetime
         ) as mock_dt:
             mock_dt.now.return_value = datetime(2026, 2, 16, 12, 0, 0)
-            result = repo._vn30_changes(Decimal("1950"))
+            result = self.repo._vn30_changes(Decimal("1950"))
 
         change_map = {c.period: c for c in result.changes}
         self.assertIsNone(change_map["1D"].old_value)
@@ -431,7 +643,7 @@ class TestHistoryRepository(unittest.TestCase):
         self.assertIsNone(change_map["1M"].old_value)
 
     @patch("gold_dashboard.repositories.history_repo.get_value_at")
-    @patch("gold_dashboard.repositories.history_repo.requests.get")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
     def test_vn30_3y_uses_seed_fallback_when_vps_and_local_miss(
         self, mock_get: MagicMock, mock_local: MagicMock
     ) -> None:
@@ -441,18 +653,17 @@ class TestHistoryRepository(unittest.TestCase):
         mock_get.side_effect = requests.exceptions.ConnectionError("down")
         mock_local.return_value = None
 
-        repo = HistoryRepository()
         with patch(
             "gold_dashboard.repositories.history_repo.datetime", wraps=datetime
         ) as mock_dt:
             mock_dt.now.return_value = datetime(2026, 2, 16, 12, 0, 0)
-            result = repo._vn30_changes(Decimal("1950"))
+            result = self.repo._vn30_changes(Decimal("1950"))
 
         change_map = {c.period: c for c in result.changes}
         self.assertEqual(change_map["3Y"].old_value, Decimal("1087.36"))
         self.assertIsNotNone(change_map["3Y"].change_percent)
 
-    @patch("gold_dashboard.repositories.history_repo.record_snapshot")
+    @patch("gold_dashboard.repositories.history_repo.record_snapshots")
     @patch("gold_dashboard.repositories.history_repo.get_value_at")
     def test_seed_historical_vn30_does_not_overwrite_existing_snapshot(
         self, mock_local: MagicMock, mock_record: MagicMock
@@ -470,13 +681,11 @@ class TestHistoryRepository(unittest.TestCase):
 
         HistoryRepository._seed_historical_vn30()
 
-        called_days = {
-            call.args[2].strftime("%Y-%m-%d") for call in mock_record.call_args_list
-        }
+        mock_record.assert_called_once()
+        snapshots = mock_record.call_args.args[0]
+        called_days = {dt.strftime("%Y-%m-%d") for _, _, dt in snapshots}
         self.assertNotIn(existing_date_str, called_days)
-        self.assertEqual(
-            len(mock_record.call_args_list), len(_VN30_HISTORICAL_SEEDS) - 1
-        )
+        self.assertEqual(len(snapshots), len(_VN30_HISTORICAL_SEEDS) - 1)
 
 
 class TestUsdVndSeeds(unittest.TestCase):
@@ -487,6 +696,8 @@ class TestUsdVndSeeds(unittest.TestCase):
         self._tmp.close()
         self._patch = patch("gold_dashboard.history_store.HISTORY_FILE", self._tmp.name)
         self._patch.start()
+        history_repo._TTL_CACHE.clear()
+        self.addCleanup(history_repo._TTL_CACHE.clear)
 
     def tearDown(self) -> None:
         self._patch.stop()
@@ -508,8 +719,8 @@ class TestUsdVndSeeds(unittest.TestCase):
             value = get_value_at("usd_vnd", dt)
             self.assertEqual(value, expected, f"Seed {date_str} not found")
 
-    @patch("gold_dashboard.repositories.history_repo.requests.post")
-    @patch("gold_dashboard.repositories.history_repo.requests.get")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.post")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
     def test_usd_vnd_changes_wires_seeds(
         self, mock_get: MagicMock, mock_post: MagicMock
     ) -> None:
@@ -542,6 +753,28 @@ class TestUsdVndSeeds(unittest.TestCase):
         value = HistoryRepository._find_seed_rate(_USD_VND_HISTORICAL_SEEDS, target)
         self.assertEqual(value, Decimal("25855"))
 
+    def test_find_chogia_rate_respects_range_bounds(self) -> None:
+        """Bounds should reject far-off targets but keep edge-of-window matches."""
+        rates = {
+            "2025-01-15": Decimal("25900"),
+            "2025-01-16": Decimal("25950"),
+        }
+        bounds = HistoryRepository._rate_bounds(rates)
+        self.assertEqual(bounds, ("2025-01-15", "2025-01-16"))
+
+        self.assertIsNone(
+            HistoryRepository._find_chogia_rate(rates, datetime(2024, 1, 15), bounds)
+        )
+        self.assertEqual(
+            HistoryRepository._find_chogia_rate(rates, datetime(2025, 1, 12), bounds),
+            Decimal("25900"),
+        )
+        self.assertEqual(
+            HistoryRepository._find_chogia_rate(rates, datetime(2025, 1, 19), bounds),
+            Decimal("25950"),
+        )
+        self.assertIsNone(HistoryRepository._rate_bounds({}))
+
 
 class TestBitcoinSeeds(unittest.TestCase):
     """Test Bitcoin historical seed and backfill methods."""
@@ -551,6 +784,8 @@ class TestBitcoinSeeds(unittest.TestCase):
         self._tmp.close()
         self._patch = patch("gold_dashboard.history_store.HISTORY_FILE", self._tmp.name)
         self._patch.start()
+        history_repo._TTL_CACHE.clear()
+        self.addCleanup(history_repo._TTL_CACHE.clear)
 
     def tearDown(self) -> None:
         self._patch.stop()
@@ -572,8 +807,8 @@ class TestBitcoinSeeds(unittest.TestCase):
             value = get_value_at("bitcoin", dt)
             self.assertEqual(value, expected, f"Seed {date_str} not found")
 
-    @patch("gold_dashboard.repositories.history_repo.requests.post")
-    @patch("gold_dashboard.repositories.history_repo.requests.get")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.post")
+    @patch("gold_dashboard.repositories.history_repo.SESSION.get")
     def test_bitcoin_changes_wires_seeds(
         self, mock_get: MagicMock, mock_post: MagicMock
     ) -> None:
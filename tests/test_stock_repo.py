@@ -5,17 +5,18 @@ from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
 from gold_dashboard.repositories.stock_repo import StockRepository
+from gold_dashboard.utils import parse_html
 
 
 class TestStockRepositoryFallbacks(unittest.TestCase):
     """Ensure VN30 fetch order prefers real VPS last-close over static fallback."""
 
     @patch("gold_dashboard.repositories.stock_repo.time.sleep", return_value=None)
-    @patch("gold_dashboard.repositories.stock_repo.requests.get")
+    @patch("gold_dashboard.repositories.stock_repo.SESSION.get")
     def test_uses_vps_last_close_when_short_window_is_empty(
         self,
         mock_get: MagicMock,
-        _mock_sleep: MagicMock,
+        mock_sleep: MagicMock,
     ) -> None:
         """When 7-day VPS window fails, repository should use 30-day VPS last close."""
         # Vietstock fails first
@@ -46,13 +47,15 @@ class TestStockRepositoryFallbacks(unittest.TestCase):
         self.assertEqual(result.source, "VPS (last close)")
         self.assertEqual(result.index_value, Decimal("2018.64"))
         self.assertIsNotNone(result.change_percent)
+        # Every backoff between the failed 7-day attempts went through the patched sleep
+        self.assertEqual(mock_sleep.call_count, 2)
 
     @patch("gold_dashboard.repositories.stock_repo.time.sleep", return_value=None)
-    @patch("gold_dashboard.repositories.stock_repo.requests.get")
+    @patch("gold_dashboard.repositories.stock_repo.SESSION.get")
     def test_falls_back_to_static_only_after_all_sources_fail(
         self,
         mock_get: MagicMock,
-        _mock_sleep: MagicMock,
+        mock_sleep: MagicMock,
     ) -> None:
         """Static fallback should be used only when every source fails."""
         import requests
@@ -64,6 +67,31 @@ class TestStockRepositoryFallbacks(unittest.TestCase):
 
         self.assertEqual(result.source, "Fallback (Scraping Failed)")
         self.assertEqual(result.index_value, Decimal("1950.00"))
+        # Both VPS windows retried with backoff, none of it in real time
+        self.assertEqual(mock_sleep.call_count, 4)
+
+
+class TestVietstockParsing(unittest.TestCase):
+    """Ensure the VN30 label lookup reads the value and change next to it."""
+
+    def test_extracts_value_and_change_after_label(self) -> None:
+        """Value and change cells following the label element should be parsed."""
+        root = parse_html(
+            b"<html><body><table><tr>"
+            b"<td> VN30-INDEX </td><td><b>2,029.81</b></td><td>10.83 (0.54%)</td>"
+            b"</tr></table></body></html>"
+        )
+
+        index_value, change_percent = StockRepository()._extract_vn30_data(root)
+
+        self.assertEqual(index_value, Decimal("2029.81"))
+        self.assertEqual(change_percent, Decimal("10.83"))
+
+    def test_returns_none_without_label(self) -> None:
+        """Pages without the VN30-INDEX label should yield (None, None)."""
+        root = parse_html(b"<html><body><p>2,029.81</p></body></html>")
+
+        self.assertEqual(StockRepository()._extract_vn30_data(root), (None, None))
 
 
 if __name__ == "__main__":
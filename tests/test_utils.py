@@ -0,0 +1,197 @@
+"""Tests for the caching decorator and number helpers in utils."""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from gold_dashboard import utils
+from gold_dashboard.models import GoldPrice
+
+
+class _CountingSource:
+    """Minimal repository stand-in whose fetch() can be made to fail."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.fail = False
+
+    @utils.cached
+    def fetch(self) -> dict:
+        self.calls += 1
+        if self.fail:
+            raise requests.exceptions.ConnectionError("network down")
+        return {"value": Decimal("1.5")}
+
+
+class TestCachedMemo(unittest.TestCase):
+    """Ensure the in-process memo sits in front of the JSON cache files."""
+
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        patcher = patch("gold_dashboard.utils.CACHE_DIR", tmpdir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        utils._MEM_CACHE.clear()
+        self.addCleanup(utils._MEM_CACHE.clear)
+
+    def test_repeat_hit_skips_cache_file(self) -> None:
+        """After the first fetch, the same process should not re-read the file."""
+        source = _CountingSource()
+        first = source.fetch()
+
+        with patch("gold_dashboard.utils._read_cache") as mock_read:
+            second = source.fetch()
+            mock_read.assert_not_called()
+
+        self.assertEqual(source.calls, 1)
+        self.assertEqual(second, first)
+        self.assertIsNot(second, first)
+
+    def test_memo_hits_return_independent_models(self) -> None:
+        """Mutating one caller's result must not change what later callers get."""
+        price = GoldPrice(buy_price=Decimal("80000000"), sell_price=Decimal("82000000"), source="Test")
+
+        class _ModelSource:
+            @utils.cached
+            def fetch(self) -> GoldPrice:
+                return price
+
+        first = _ModelSource().fetch()
+        first.sell_price = Decimal("1")
+
+        second = _ModelSource().fetch()
+        self.assertEqual(second.sell_price, Decimal("82000000"))
+        self.assertIsNot(second, first)
+
+    def test_fresh_cache_file_is_used_when_memo_is_empty(self) -> None:
+        """A cache file written by an earlier process should still be served."""
+        _CountingSource().fetch()
+        utils._MEM_CACHE.clear()
+
+        source = _CountingSource()
+        self.assertEqual(source.fetch(), {"value": Decimal("1.5")})
+        self.assertEqual(source.calls, 0)
+
+    def test_stale_fallback_is_memoized_briefly(self) -> None:
+        """A stale value served on failure should expire well before the full TTL."""
+        _CountingSource().fetch()
+        utils._MEM_CACHE.clear()
+
+        source = _CountingSource()
+        source.fail = True
+        with patch("gold_dashboard.utils._read_cache", return_value=None):
+            self.assertEqual(source.fetch(), {"value": Decimal("1.5")})
+
+        expiry, _ = utils._MEM_CACHE["_CountingSource_fetch"]
+        self.assertLessEqual(expiry, time.time() + utils._STALE_MEMO_SECONDS)
+
+    def test_write_replaces_entry_without_leaving_temp_files(self) -> None:
+        """Cache entries are swapped in whole; no temp file should remain."""
+        _CountingSource().fetch()
+
+        self.assertEqual(os.listdir(utils.CACHE_DIR), ["_CountingSource_fetch.json"])
+
+    def test_dataclass_round_trips_through_cache_format(self) -> None:
+        """A model written in one pass should be rebuilt equal on read."""
+        price = GoldPrice(
+            buy_price=Decimal("80000000"),
+            sell_price=Decimal("82000000"),
+            source="Test",
+            timestamp=datetime(2026, 3, 1, 9, 30),
+        )
+
+        encoded = json.dumps(utils._serialize_for_cache(price))
+        decoded = json.loads(encoded, object_hook=utils._decode_cache_object)
+
+        self.assertEqual(decoded, price)
+
+    def test_unknown_dataclass_tag_decodes_to_dict(self) -> None:
+        """A model name this build does not know should fall back to the raw dict."""
+        encoded = '{"__dataclass__":"RetiredModel","data":{"value":{"__decimal__":"1.5"}}}'
+
+        decoded = json.loads(encoded, object_hook=utils._decode_cache_object)
+
+        self.assertEqual(decoded, {"__dataclass__": "RetiredModel", "data": {"value": Decimal("1.5")}})
+
+
+class TestFetchHtml(unittest.TestCase):
+    """Ensure streamed pages parse chunk by chunk and fail as requests errors."""
+
+    @staticmethod
+    def _response(chunks) -> MagicMock:
+        response = MagicMock()
+        response.raise_for_status = MagicMock()
+        response.iter_content.return_value = chunks
+        return response
+
+    @patch("gold_dashboard.utils.SESSION.get")
+    def test_parses_page_fed_in_chunks(self, mock_get: MagicMock) -> None:
+        mock_get.return_value = self._response([b"<html><body><p>80.000", b".000</p></body></html>"])
+
+        root = utils.fetch_html("https://example.test/")
+
+        self.assertEqual(utils.html_text(root), "80.000.000")
+        mock_get.return_value.close.assert_called_once()
+
+    @patch("gold_dashboard.utils.SESSION.get")
+    def test_mid_stream_failure_raises_request_exception(self, mock_get: MagicMock) -> None:
+        """A reset after the first chunk must reach callers as a RequestException."""
+        def chunks():
+            yield b"<html><body><p>80.000"
+            raise requests.exceptions.ChunkedEncodingError("connection reset mid-body")
+
+        mock_get.return_value = self._response(chunks())
+
+        with self.assertRaises(requests.exceptions.RequestException):
+            utils.fetch_html("https://example.test/")
+        mock_get.return_value.close.assert_called_once()
+
+    @patch("gold_dashboard.utils.SESSION.get")
+    def test_empty_body_raises_value_error(self, mock_get: MagicMock) -> None:
+        mock_get.return_value = self._response([])
+
+        with self.assertRaises(ValueError):
+            utils.fetch_html("https://example.test/")
+
+
+class TestSanitizeVnNumber(unittest.TestCase):
+    """Cover both separator conventions and the non-numeric filter."""
+
+    def test_vietnamese_and_international_formats(self) -> None:
+        self.assertEqual(utils.sanitize_vn_number("25.500.000,50"), Decimal("25500000.50"))
+        self.assertEqual(utils.sanitize_vn_number("2,029.81"), Decimal("2029.81"))
+        self.assertEqual(utils.sanitize_vn_number("80.000.000"), Decimal("80000000"))
+
+    def test_strips_currency_text_and_unit_superscripts(self) -> None:
+        """Only ASCII digits survive the filter, so 'm²' adds no stray digit."""
+        self.assertEqual(utils.sanitize_vn_number(" 240.000.000 đ/m² "), Decimal("240000000"))
+        self.assertEqual(utils.sanitize_vn_number("25800 VND"), Decimal("25800"))
+
+    def test_plain_numbers_skip_separator_heuristics(self) -> None:
+        """Clean API numbers should parse directly without the memoized slow path."""
+        with patch("gold_dashboard.utils._sanitize_vn_str") as mock_slow:
+            self.assertEqual(utils.sanitize_vn_number("2600000000"), Decimal("2600000000"))
+            self.assertEqual(utils.sanitize_vn_number("1995.12"), Decimal("1995.12"))
+            mock_slow.assert_not_called()
+
+    def test_unparseable_returns_none(self) -> None:
+        self.assertIsNone(utils.sanitize_vn_number("liên hệ"))
+        self.assertIsNone(utils.sanitize_vn_number(""))
+
+    def test_intl_variant_skips_format_detection(self) -> None:
+        """The fixed-format parser reads commas as thousands, even when only one."""
+        self.assertEqual(utils.sanitize_vn_number_intl("2,029.81"), Decimal("2029.81"))
+        self.assertEqual(utils.sanitize_vn_number_intl("1,950"), Decimal("1950"))
+        self.assertIsNone(utils.sanitize_vn_number_intl("N/A"))
+
+
+if __name__ == "__main__":
+    unittest.main()